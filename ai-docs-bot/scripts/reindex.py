@@ -10,10 +10,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from src.config.settings import get_settings
 from src.ingestion.docs_loader import load_docs_from_sitemap
 from src.ingestion.github_loader import load_github_repo
-from src.storage.chroma_store import (
-    get_chroma_client,
-    create_index_from_documents,
-)
+from src.storage.chroma_store import create_index_from_documents
 
 def main():
     parser = argparse.ArgumentParser(description="Re-index the knowledge base")
@@ -24,14 +21,6 @@ def main():
     settings = get_settings()
     documents = []
 
-    # Clear existing collection
-    print("Clearing existing index...")
-    client = get_chroma_client()
-    try:
-        client.delete_collection("knowledge_base")
-    except ValueError:
-        pass  # Collection doesn't exist
-
     # Load docs
     if not args.code_only:
         print(f"Loading docs from {settings.DOCS_SITEMAP_URL}...")
@@ -56,10 +45,10 @@ def main():
         print("No documents to index!")
         sys.exit(1)
 
-    # Create index
-    print(f"Creating index with {len(documents)} documents...")
+    # Sync index - unchanged chunks are kept, stale ones removed
+    print(f"Updating index with {len(documents)} documents...")
     index = create_index_from_documents(documents)
-    print("Done! Index created successfully.")
+    print("Done! Index updated successfully.")
 
 if __name__ == "__main__":
     main()
@@ -1,28 +1,51 @@
-from slack_bolt import App
-from slack_bolt.adapter.socket_mode import SocketModeHandler
+import asyncio
+from llama_index.core import QueryBundle
+from slack_bolt.async_app import AsyncApp
+from slack_bolt.adapter.socket_mode.async_handler import AsyncSocketModeHandler
 from src.config.settings import get_settings
 from src.bot.handlers import register_handlers
+from src.retrieval.query_engine import configure_llm, get_query_engine
+from src.storage.chroma_store import get_embed_model
 import logging
 
 logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
 
-def create_app() -> App:
+def _warm() -> None:
+    """Load the embed model and open the index before the first query.
+
+    Runs a retrieval-only lookup, so the LLM is never called during warmup.
+    """
+    try:
+        get_embed_model().get_text_embedding("warm")
+        get_query_engine().retrieve(QueryBundle("ping"))
+    except Exception as e:
+        logger.warning(f"Warmup failed, first query will be slower: {e}")
+
+def create_app() -> AsyncApp:
     settings = get_settings()
-    app = App(token=settings.SLACK_BOT_TOKEN)
+    app = AsyncApp(token=settings.SLACK_BOT_TOKEN)
+    # Configure the LLM once at startup so bad config fails fast
+    configure_llm()
     register_handlers(app)
+    if settings.WARM_ON_START:
+        _warm()
     
     @app.error
-    def global_error_handler(error, body, logger):
+    async def global_error_handler(error, body, logger):
         logger.error(f"Unhandled error: {error}")
         logger.debug(f"Request body: {body}")
     
     return app
 
-def run_bot():
+async def _start_bot():
     settings = get_settings()
     app = create_app()
-    handler = SocketModeHandler(app, settings.SLACK_APP_TOKEN)
-    handler.start()
+    handler = AsyncSocketModeHandler(app, settings.SLACK_APP_TOKEN)
+    await handler.start_async()
+
+def run_bot():
+    asyncio.run(_start_bot())
 
 if __name__ == "__main__":
     run_bot()
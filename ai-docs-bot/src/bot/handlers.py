@@ -1,49 +1,104 @@
-import threading
-from slack_bolt import App
+import asyncio
+import atexit
+import re
+from concurrent.futures import ThreadPoolExecutor
+from slack_bolt.async_app import AsyncApp
+from src.config.settings import get_settings
 from src.retrieval.query_engine import query
 from src.bot.responses import format_response
 import logging
 
 logger = logging.getLogger(__name__)
 
-def run_query_in_background(client, channel, ts, question, thread_ts=None):
-    """Execute RAG query in background thread and update message when done."""
-    def _do_query():
+# Matches a bot mention like "<@U123ABC> " at any position in the text
+_MENTION_RE = re.compile(r'<@[A-Z0-9]+>\s*')
+
+# Shared worker pool bounding how many blocking RAG queries run at once
+_pool_size = get_settings().QUERY_POOL_SIZE
+_executor = ThreadPoolExecutor(max_workers=_pool_size, thread_name_prefix="rag")
+atexit.register(_executor.shutdown, wait=False)
+
+# Number of submitted queries that haven't finished yet
+_pending = 0
+
+# Strong references so in-flight tasks aren't garbage collected
+_background_tasks: set[asyncio.Task] = set()
+
+async def run_query_in_background(client, channel, ts, question, thread_ts=None):
+    """Schedule RAG query on the worker pool and update message when done."""
+    global _pending
+    queued = _pending >= _pool_size
+
+    loop = asyncio.get_running_loop()
+    partial_updates = []
+
+    def _on_partial(text):
+        # Runs on the worker thread; query() already throttles the calls
+        partial_updates.append(asyncio.run_coroutine_threadsafe(
+            client.chat_update(channel=channel, ts=ts, text=text + " …"),
+            loop,
+        ))
+
+    async def _wait_for_partial_updates():
+        # Let in-flight partial updates land before the final message,
+        # so a late one can't overwrite it
+        await asyncio.gather(
+            *(asyncio.wrap_future(f) for f in partial_updates),
+            return_exceptions=True,
+        )
+
+    async def _do_query():
+        global _pending
         try:
-            result = query(question)
+            if queued:
+                await client.chat_update(
+                    channel=channel,
+                    ts=ts,
+                    text=":hourglass_flowing_sand: All workers are busy, your question is queued..."
+                )
+
+            # query() is blocking, so keep it off the event loop
+            result = await loop.run_in_executor(_executor, query, question, _on_partial)
             response_text = format_response(result)
 
+            await _wait_for_partial_updates()
+
             update_kwargs = {
                 "channel": channel,
                 "ts": ts,
                 "text": response_text
             }
-            client.chat_update(**update_kwargs)
+            await client.chat_update(**update_kwargs)
         except Exception as e:
             logger.error(f"Query failed: {e}")
-            client.chat_update(
+            await _wait_for_partial_updates()
+            await client.chat_update(
                 channel=channel,
                 ts=ts,
                 text=f":x: Sorry, I encountered an error: {str(e)[:100]}"
             )
+        finally:
+            _pending -= 1
 
-    thread = threading.Thread(target=_do_query, daemon=True)
-    thread.start()
+    # Counted off in _do_query's finally, so a failed Slack call can't leak it
+    _pending += 1
+    task = asyncio.create_task(_do_query())
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
 
-def register_handlers(app: App):
+def register_handlers(app: AsyncApp):
     @app.event("app_mention")
-    def handle_mention(event, client, logger):
+    async def handle_mention(event, client, logger):
         """Handle @mentions in channels."""
         channel = event["channel"]
         thread_ts = event.get("thread_ts", event["ts"])
         user_text = event["text"]
 
         # Remove bot mention from text
-        import re
-        question = re.sub(r'<@[A-Z0-9]+>\s*', '', user_text).strip()
+        question = _MENTION_RE.sub('', user_text).strip()
 
         if not question:
-            client.chat_postMessage(
+            await client.chat_postMessage(
                 channel=channel,
                 thread_ts=thread_ts,
                 text="Please ask me a question! Example: @bot how do I configure X?"
@@ -51,14 +106,14 @@ def register_handlers(app: App):
             return
 
         # Post "thinking" message IMMEDIATELY
-        thinking_msg = client.chat_postMessage(
+        thinking_msg = await client.chat_postMessage(
             channel=channel,
             thread_ts=thread_ts,
             text=":thinking_face: Searching knowledge base..."
         )
 
-        # Run query in background thread
-        run_query_in_background(
+        # Run query on the worker pool
+        await run_query_in_background(
             client=client,
             channel=channel,
             ts=thinking_msg["ts"],
@@ -67,7 +122,7 @@ def register_handlers(app: App):
         )
 
     @app.event("message")
-    def handle_dm(event, client, logger):
+    async def handle_dm(event, client, logger):
         """Handle direct messages."""
         # Only handle DMs, not channel messages
         if event.get("channel_type") != "im":
@@ -84,13 +139,13 @@ def register_handlers(app: App):
             return
 
         # Post "thinking" message IMMEDIATELY
-        thinking_msg = client.chat_postMessage(
+        thinking_msg = await client.chat_postMessage(
             channel=channel,
             text=":thinking_face: Searching knowledge base..."
         )
 
-        # Run query in background thread
-        run_query_in_background(
+        # Run query on the worker pool
+        await run_query_in_background(
             client=client,
             channel=channel,
             ts=thinking_msg["ts"],
@@ -2,9 +2,10 @@ import os
 from dataclasses import dataclass
 from dotenv import load_dotenv
 
-load_dotenv()
+# .env is read once, on the first settings load, never over existing env vars
+_dotenv_loaded = False
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Settings:
     SLACK_BOT_TOKEN: str
     SLACK_APP_TOKEN: str
@@ -14,13 +15,51 @@ class Settings:
     DOCS_SITEMAP_URL: str
     GITHUB_REPO_URL: str
     CHROMA_PERSIST_DIR: str
+    CHROMA_MODE: str
+    CHROMA_HOST: str
+    CHROMA_PORT: int
     LLM_PROVIDER: str
     OLLAMA_MODEL: str
     OLLAMA_BASE_URL: str
     OLLAMA_TIMEOUT: float
     OLLAMA_CONTEXT_WINDOW: int
+    QUERY_POOL_SIZE: int
+    WARM_ON_START: bool
+    EMBED_BATCH_SIZE: int
+    EMBED_BACKEND: str
+    EMBED_ONNX_FILE: str
+    RERANK_MODEL: str
+    RETRIEVAL_TOP_K: int
+    RERANK_TOP_N: int
+
+# Process-wide settings, parsed on first get_settings() call
+_settings: Settings | None = None
 
 def get_settings() -> Settings:
+    """Load settings from environment variables.
+
+    Parsed once per process; call get_settings.cache_clear() after changing
+    the environment to pick up new values.
+    """
+    global _settings
+    if _settings is None:
+        _settings = _load_settings()
+    return _settings
+
+def _clear_settings() -> None:
+    """Drop the parsed settings so the next get_settings() re-reads the env."""
+    global _settings
+    _settings = None
+
+get_settings.cache_clear = _clear_settings
+
+def _load_settings() -> Settings:
+    """Build Settings from the current environment."""
+    global _dotenv_loaded
+    if not _dotenv_loaded:
+        load_dotenv(override=False)
+        _dotenv_loaded = True
+
     return Settings(
         SLACK_BOT_TOKEN=os.getenv("SLACK_BOT_TOKEN", ""),
         SLACK_APP_TOKEN=os.getenv("SLACK_APP_TOKEN", ""),
@@ -30,9 +69,20 @@ def get_settings() -> Settings:
         DOCS_SITEMAP_URL=os.getenv("DOCS_SITEMAP_URL", ""),
         GITHUB_REPO_URL=os.getenv("GITHUB_REPO_URL", ""),
         CHROMA_PERSIST_DIR=os.getenv("CHROMA_PERSIST_DIR", "./data/chroma_db"),
+        CHROMA_MODE=os.getenv("CHROMA_MODE", "persistent"),
+        CHROMA_HOST=os.getenv("CHROMA_HOST", "127.0.0.1"),
+        CHROMA_PORT=int(os.getenv("CHROMA_PORT", "8000")),
         LLM_PROVIDER=os.getenv("LLM_PROVIDER", "openai"),
         OLLAMA_MODEL=os.getenv("OLLAMA_MODEL", "llama3.2"),
         OLLAMA_BASE_URL=os.getenv("OLLAMA_BASE_URL", "http://localhost:11434"),
         OLLAMA_TIMEOUT=float(os.getenv("OLLAMA_TIMEOUT", "120.0")),
         OLLAMA_CONTEXT_WINDOW=int(os.getenv("OLLAMA_CONTEXT_WINDOW", "8192")),
+        QUERY_POOL_SIZE=int(os.getenv("QUERY_POOL_SIZE", "8")),
+        WARM_ON_START=os.getenv("WARM_ON_START", "true").lower() == "true",
+        EMBED_BATCH_SIZE=int(os.getenv("EMBED_BATCH_SIZE", "128")),
+        EMBED_BACKEND=os.getenv("EMBED_BACKEND", "torch"),
+        EMBED_ONNX_FILE=os.getenv("EMBED_ONNX_FILE", ""),
+        RERANK_MODEL=os.getenv("RERANK_MODEL", "BAAI/bge-reranker-base"),
+        RETRIEVAL_TOP_K=int(os.getenv("RETRIEVAL_TOP_K", "20")),
+        RERANK_TOP_N=int(os.getenv("RERANK_TOP_N", "5")),
     )
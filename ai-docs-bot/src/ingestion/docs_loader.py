@@ -1,10 +1,27 @@
 """Docs website ingestion via sitemap parsing."""
 import requests
 import time
-from xml.etree import ElementTree
-from typing import List
-from llama_index.readers.web import SimpleWebPageReader
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from lxml import etree
+from typing import List, Optional, Set
+from html2text import html2text
 from llama_index.core import Document
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+SITEMAP_NS = '{http://www.sitemaps.org/schemas/sitemap/0.9}'
+
+# Shared HTTP session: keep-alive connections are reused across sitemap
+# fetches, and transient failures are retried with backoff.
+_session = requests.Session()
+_adapter = HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=32,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=(429, 500, 502, 503, 504)),
+)
+_session.mount("http://", _adapter)
+_session.mount("https://", _adapter)
 
 
 def parse_sitemap(sitemap_url: str) -> List[str]:
@@ -13,63 +30,116 @@ def parse_sitemap(sitemap_url: str) -> List[str]:
     Handles both:
     - <urlset> (regular sitemap with page URLs)
     - <sitemapindex> (sitemap index pointing to other sitemaps)
+
+    Returns deduplicated /docs/ URLs in sorted order.
+    """
+    return sorted(_collect_sitemap_urls(sitemap_url, visited=set()))
+
+
+def _collect_sitemap_urls(sitemap_url: str, visited: Set[str]) -> Set[str]:
+    """Return page URLs from a sitemap and its child sitemaps.
+
+    The response is streamed through lxml's iterparse, which matches
+    entries in C, and each entry is freed once read, so memory stays flat
+    on large sitemaps. Sitemaps already in `visited` are skipped so
+    cross-referenced children are fetched once. A child sitemap's URLs are
+    merged only once it parses fully, so a failed child adds nothing.
+    """
+    visited.add(sitemap_url)
+    urls: Set[str] = set()
+
+    # Closing the streamed response returns its connection to the pool,
+    # even if parsing fails partway through
+    with _session.get(sitemap_url, stream=True, timeout=30) as response:
+        response.raise_for_status()
+        response.raw.decode_content = True
+
+        child_sitemaps = []
+
+        entries = etree.iterparse(
+            response.raw,
+            events=('end',),
+            tag=(f'{SITEMAP_NS}sitemap', f'{SITEMAP_NS}url'),
+        )
+        for _, elem in entries:
+            loc = elem.findtext(f'{SITEMAP_NS}loc')
+            if elem.tag == f'{SITEMAP_NS}sitemap':
+                # Sitemap index entry - remember child sitemap to parse
+                if loc and loc not in visited:
+                    visited.add(loc)
+                    child_sitemaps.append(loc)
+            elif loc and '/docs/' in loc:
+                # Regular urlset entry - keep only /docs/ page URLs
+                urls.add(loc)
+
+            # Free this entry and any already-processed siblings
+            elem.clear()
+            while elem.getprevious() is not None:
+                del elem.getparent()[0]
+
+    # Recursively parse each child sitemap
+    for child_url in child_sitemaps:
+        try:
+            urls |= _collect_sitemap_urls(child_url, visited)
+        except Exception as e:
+            print(f"Failed to parse child sitemap {child_url}: {e}")
+            continue
+
+    return urls
+
+
+def _fetch_page(url: str, delay: float) -> Optional[str]:
+    """Fetch a page's HTML over the shared session, or None on failure.
+
+    Only successful fetches wait `delay`; failures already back off
+    through the session's retry policy.
     """
-    response = requests.get(sitemap_url, timeout=30)
-    response.raise_for_status()
-
-    root = ElementTree.fromstring(response.content)
-    namespaces = {'sm': 'http://www.sitemaps.org/schemas/sitemap/0.9'}
-
-    urls = []
-
-    # Check if this is a sitemap index (contains <sitemap> elements)
-    sitemap_locs = root.findall('.//sm:sitemap/sm:loc', namespaces)
-    if sitemap_locs:
-        # Recursively parse each child sitemap
-        for sitemap_loc in sitemap_locs:
-            child_url = sitemap_loc.text
-            if child_url:
-                try:
-                    child_urls = parse_sitemap(child_url)
-                    urls.extend(child_urls)
-                except Exception as e:
-                    print(f"Failed to parse child sitemap {child_url}: {e}")
-                    continue
-    else:
-        # Regular urlset - extract page URLs
-        for url_elem in root.findall('.//sm:url/sm:loc', namespaces):
-            if url_elem.text:
-                urls.append(url_elem.text)
-
-    # Filter to only /docs/ paths if needed
-    return [u for u in urls if '/docs/' in u]
-
-
-def load_docs_from_sitemap(sitemap_url: str, delay: float = 0.5) -> List[Document]:
+    try:
+        response = _session.get(url, timeout=30)
+        response.raise_for_status()
+    except Exception as e:
+        print(f"Failed to load {url}: {e}")
+        return None
+    time.sleep(delay)  # Rate limiting
+    return response.text
+
+
+def load_docs_from_sitemap(
+    sitemap_url: str,
+    delay: float = 0.5,
+    max_workers: int = 8,
+) -> List[Document]:
     """Load all documents from a sitemap.
 
+    Pages are fetched concurrently; each worker waits `delay` seconds after
+    a successful request, so at most `max_workers` requests are in flight
+    at once.
+    HTML-to-text conversion is CPU-bound, so it runs in a process pool.
+
     Args:
         sitemap_url: URL to the sitemap.xml file
-        delay: Delay between requests in seconds (rate limiting)
+        delay: Delay between requests per worker in seconds (rate limiting)
+        max_workers: Maximum number of concurrent page fetches
 
     Returns:
         List of LlamaIndex Document objects
     """
     urls = parse_sitemap(sitemap_url)
 
-    documents = []
-    reader = SimpleWebPageReader(html_to_text=True)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pages = list(executor.map(_fetch_page, urls, [delay] * len(urls)))
 
-    for url in urls:
-        try:
-            docs = reader.load_data([url])
-            for doc in docs:
-                doc.metadata['source'] = url
-                doc.metadata['source_type'] = 'docs'
-            documents.extend(docs)
-            time.sleep(delay)  # Rate limiting
-        except Exception as e:
-            print(f"Failed to load {url}: {e}")
-            continue
+    fetched = [(url, html) for url, html in zip(urls, pages) if html is not None]
+    if not fetched:
+        return []
+
+    with ProcessPoolExecutor() as pool:
+        texts = list(pool.map(html2text, [html for _, html in fetched], chunksize=8))
 
-    return documents
+    return [
+        Document(
+            text=text,
+            metadata={'url': url, 'source': url, 'source_type': 'docs'},
+        )
+        for (url, _), text in zip(fetched, texts)
+    ]
@@ -1,87 +1,174 @@
 """GitHub repository document loader."""
 import os
+import re
 import tempfile
-from typing import List, Optional
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional
 from git import Repo
 from llama_index.core import SimpleDirectoryReader, Document
 
 # File extensions to include
-INCLUDE_EXTENSIONS = {
+INCLUDE_EXTENSIONS = frozenset({
     '.py', '.ts', '.tsx', '.js', '.jsx',
     '.md', '.rst', '.txt',
     '.json', '.yaml', '.yml', '.toml',
     '.html', '.css', '.scss',
     '.sql', '.sh', '.bash',
     '.go', '.rs', '.java', '.kt',
-}
+})
+
+# Tuple form for str.endswith, which tests every suffix in one call
+_INCLUDE_SUFFIXES = tuple(sorted(INCLUDE_EXTENSIONS))
 
 # Directories to exclude
-EXCLUDE_DIRS = {
+EXCLUDE_DIRS = frozenset({
     'node_modules', 'vendor', 'dist', 'build',
     '.git', '.github', '__pycache__', '.pytest_cache',
     'venv', '.venv', 'env', '.env',
     'coverage', '.coverage', 'htmlcov',
-}
+})
+
+# Matches any excluded directory as a whole path component
+_EXCLUDE_RE = re.compile(
+    r'(?:^|[\\/])(?:' + '|'.join(map(re.escape, sorted(EXCLUDE_DIRS))) + r')(?:[\\/]|$)'
+)
 
 MAX_FILE_SIZE = 100 * 1024  # 100KB
 
+# Files handed to SimpleDirectoryReader per load_data call; small enough
+# that even modest repos spread across the reader threads
+FILE_BATCH_SIZE = 64
+
+def _has_included_extension(name: str) -> bool:
+    """Check a file name against INCLUDE_EXTENSIONS, ignoring case.
+
+    Names with a lowercase extension match on the first endswith call;
+    only misses pay for building a lowercased copy.
+    """
+    if not (name.endswith(_INCLUDE_SUFFIXES) or name.lower().endswith(_INCLUDE_SUFFIXES)):
+        return False
+    # As with os.path.splitext, a bare dotfile such as ".md" has no extension
+    return '.' in os.path.basename(name).lstrip('.')
+
 def should_include_file(file_path: str) -> bool:
-    """Check if a file should be included in the index."""
+    """Check if a file should be included in the index.
+
+    For paths from outside the repo walk; _iter_repo_files prunes
+    EXCLUDE_DIRS itself and checks entries with _include_entry instead.
+    """
     # Check extension
-    _, ext = os.path.splitext(file_path)
-    if ext.lower() not in INCLUDE_EXTENSIONS:
+    if not _has_included_extension(file_path):
         return False
 
-    # Check file size
-    if os.path.getsize(file_path) > MAX_FILE_SIZE:
+    # Check if in excluded directory before paying for a stat call
+    if _EXCLUDE_RE.search(file_path):
         return False
 
-    # Check if in excluded directory
-    parts = file_path.split(os.sep)
-    if any(part in EXCLUDE_DIRS for part in parts):
+    # Check file size
+    return os.path.getsize(file_path) <= MAX_FILE_SIZE
+
+def _include_entry(entry: os.DirEntry) -> bool:
+    """Check a directory entry found while walking the repo.
+
+    Parent directories are already pruned against EXCLUDE_DIRS, so only
+    extension and size are checked. The size comes from the entry's
+    cached stat, so each file costs at most one stat call.
+    """
+    if not _has_included_extension(entry.name):
         return False
 
-    return True
+    return entry.stat().st_size <= MAX_FILE_SIZE
+
+def _iter_repo_files(repo_dir: str) -> Iterator[str]:
+    """Yield paths of indexable files under repo_dir, skipping EXCLUDE_DIRS."""
+    pending = [repo_dir]
+    while pending:
+        with os.scandir(pending.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in EXCLUDE_DIRS:
+                        pending.append(entry.path)
+                elif entry.is_file() and _include_entry(entry):
+                    yield entry.path
+
+def _batched(items: Iterable[str], size: int) -> Iterator[List[str]]:
+    """Yield successive lists of at most `size` items from an iterable."""
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
 
 def clone_repo(repo_url: str, target_dir: Optional[str] = None) -> str:
-    """Clone a git repository and return the path."""
+    """Clone a git repository and return the path.
+
+    Only the working tree is indexed, so clones are shallow (latest commit
+    of the default branch, no history) and updates fetch just that commit.
+    """
     if target_dir is None:
         target_dir = tempfile.mkdtemp(prefix='repo_')
 
     if os.path.exists(os.path.join(target_dir, '.git')):
-        # Already cloned, just pull
+        # Already cloned, move to the latest commit without fetching history
         repo = Repo(target_dir)
-        repo.remotes.origin.pull()
+        repo.git.fetch('--depth=1')
+        repo.git.reset('--hard', 'origin/HEAD')
     else:
-        Repo.clone_from(repo_url, target_dir)
+        Repo.clone_from(repo_url, target_dir, depth=1, multi_options=['--single-branch'])
 
     return target_dir
 
-def load_github_repo(repo_url: str) -> List[Document]:
-    """Load all documents from a GitHub repository."""
-    repo_dir = clone_repo(repo_url)
+def _load_files(input_files: List[str]) -> List[Document]:
+    """Read one batch of files into Documents."""
+    return SimpleDirectoryReader(input_files=input_files).load_data()
+
+def load_github_repo(repo_url: str, max_workers: int = 8) -> List[Document]:
+    """Load all documents from a GitHub repository.
 
-    # Get all files that pass the filter
-    all_files = []
-    for root, dirs, files in os.walk(repo_dir):
-        # Prune excluded directories
-        dirs[:] = [d for d in dirs if d not in EXCLUDE_DIRS]
+    File reading is I/O-bound, so batches of files are read concurrently
+    in a thread pool; documents keep the walk order. At most max_workers
+    batches are in flight, so the repo walk advances only as fast as
+    files are read.
 
-        for file in files:
-            file_path = os.path.join(root, file)
-            if should_include_file(file_path):
-                all_files.append(file_path)
+    Args:
+        repo_url: URL of the repository to clone
+        max_workers: Maximum number of batches read at once
 
-    # Load documents
-    reader = SimpleDirectoryReader(input_files=all_files)
-    documents = reader.load_data()
+    Returns:
+        List of LlamaIndex Document objects
+    """
+    repo_dir = clone_repo(repo_url)
 
-    # Add metadata
+    # Read files that pass the filter in batches, several batches at a time
+    documents = []
+    batches = _batched(_iter_repo_files(repo_dir), FILE_BATCH_SIZE)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        in_flight = deque(
+            executor.submit(_load_files, batch)
+            for batch in islice(batches, max_workers)
+        )
+        while in_flight:
+            documents.extend(in_flight.popleft().result())
+            batch = next(batches, None)
+            if batch is not None:
+                in_flight.append(executor.submit(_load_files, batch))
+
+    # Add metadata; paths come from the walk, so most start with repo_dir
     repo_name = repo_url.rstrip('/').split('/')[-1]
+    source_prefix = f"{repo_name}/"
+    dir_prefix = os.path.join(repo_dir, '')
     for doc in documents:
-        rel_path = os.path.relpath(doc.metadata.get('file_path', ''), repo_dir)
-        doc.metadata['source'] = f"{repo_name}/{rel_path}"
+        file_path = doc.metadata.get('file_path', '')
+        if file_path.startswith(dir_prefix):
+            rel_path = file_path[len(dir_prefix):]
+        else:
+            rel_path = os.path.relpath(file_path, repo_dir)
+        doc.metadata['source'] = source_prefix + rel_path
         doc.metadata['source_type'] = 'code'
         doc.metadata['repo_url'] = repo_url
+        # The clone lives in a fresh temp dir on every run; keep its path
+        # out of the embedded text so chunk IDs stay stable across reindexes
+        doc.excluded_embed_metadata_keys.append('file_path')
+        doc.excluded_llm_metadata_keys.append('file_path')
 
     return documents
@@ -4,24 +4,45 @@ Provides a factory function to instantiate LLM providers (OpenAI or Ollama)
 based on configuration, with health checks and helpful error messages.
 """
 
+from functools import lru_cache
+from types import SimpleNamespace
 from typing import Any
 
+try:
+    # orjson decodes the /api/tags model list several times faster
+    from orjson import loads as _json_loads
+except ImportError:
+    from json import loads as _json_loads
+
 import requests
 from llama_index.llms.ollama import Ollama
 from llama_index.llms.openai import OpenAI
+from requests.adapters import HTTPAdapter
 
 from src.config.settings import get_settings
 
-# Cache to avoid repeated health checks
-_llm_cache: dict[str, Any] = {}
+# Provider clients keyed by provider plus every setting the client is built
+# from, so each distinct configuration is built and health-checked once
+_client_cache: dict[tuple, Any] = {}
+
+# (connect, read) seconds: an unreachable Ollama fails fast on connect,
+# while a busy one still gets time to answer
+HEALTH_CHECK_TIMEOUT = (0.5, 2.0)
+
+# Shared HTTP session so Ollama health checks reuse pooled connections.
+# No retries: an unreachable Ollama should fail fast with a clear error.
+_session = requests.Session()
+_session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+_session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
 
 
 def get_llm(system_prompt: str | None = None) -> OpenAI | Ollama:
     """Get an LLM instance based on configuration.
     
     Returns an OpenAI or Ollama LLM instance based on the LLM_PROVIDER
-    environment variable. Caches the instance per process to avoid
-    repeated health checks for Ollama.
+    environment variable. The underlying client is built once per
+    provider configuration, so varying system_prompt only costs a shallow
+    copy, not another constructor call or Ollama health check.
     
     Args:
         system_prompt: Optional system prompt to use for the LLM.
@@ -33,76 +54,150 @@ def get_llm(system_prompt: str | None = None) -> OpenAI | Ollama:
         ValueError: If LLM_PROVIDER is not 'openai' or 'ollama'.
         ConnectionError: If Ollama provider is selected but unreachable.
     """
-    settings = get_settings()
+    # Memoized per (client settings, system_prompt) to handle different contexts
+    return _build_llm(_client_key(get_settings()), system_prompt)
+
+
+def _client_key(settings) -> tuple:
+    """Return the provider and the settings its client is built from."""
     provider = settings.LLM_PROVIDER
+    names = _PROVIDER_SETTINGS.get(provider, ())
+    return (provider, *(getattr(settings, name) for name in names))
+
+
+def _settings_from_key(client_key: tuple) -> SimpleNamespace:
+    """Rebuild the settings a client key was taken from."""
+    provider, *values = client_key
+    names = _PROVIDER_SETTINGS.get(provider, ())
+    return SimpleNamespace(LLM_PROVIDER=provider, **dict(zip(names, values)))
+
+
+@lru_cache(maxsize=None)
+def _build_llm(client_key: tuple, system_prompt: str | None) -> OpenAI | Ollama:
+    """Build the per-system-prompt view over the provider's cached client.
+
+    The client is built from the values in client_key, not a fresh
+    get_settings() call, so it always matches the key it is cached under.
+    """
+    client = _client_cache.get(client_key)
+    if client is None:
+        client = _create_client(_settings_from_key(client_key))
+        _client_cache[client_key] = client
     
-    # Check cache first (key includes system_prompt to handle different contexts)
-    cache_key = f"{provider}:{system_prompt}"
-    if cache_key in _llm_cache:
-        return _llm_cache[cache_key]
+    return client.model_copy(update={"system_prompt": system_prompt})
+
+
+class _LRUCacheView:
+    """Sized, clearable view over an lru_cache-wrapped function.
+
+    Clearing it also clears `dependents`, caches the function reads from.
+    """
+
+    def __init__(self, cached_fn, *dependents):
+        self._cached_fn = cached_fn
+        self._dependents = dependents
+
+    def __len__(self) -> int:
+        return self._cached_fn.cache_info().currsize
+
+    def clear(self) -> None:
+        self._cached_fn.cache_clear()
+        for cache in self._dependents:
+            cache.clear()
+
+
+# Per-system-prompt views over the cached clients
+_llm_cache = _LRUCacheView(_build_llm, _client_cache)
+
+
+def _create_client(settings) -> OpenAI | Ollama:
+    """Build the configured provider's LLM without a system prompt.
+
+    Raises:
+        ValueError: If LLM_PROVIDER is not 'openai' or 'ollama'.
+        ConnectionError: If Ollama provider is selected but unreachable.
+    """
+    provider = settings.LLM_PROVIDER
+    try:
+        build = _PROVIDER_BUILDERS[provider]
+    except KeyError:
+        raise ValueError(
+            f"Invalid LLM_PROVIDER: {provider}. Must be 'openai' or 'ollama'."
+        ) from None
+    return build(settings)
+
+
+def _build_openai(settings) -> OpenAI:
+    """Build the OpenAI client."""
+    return OpenAI(
+        api_key=settings.OPENAI_API_KEY,
+        api_base=settings.OPENAI_API_BASE,
+        model=settings.LLM_MODEL,
+        temperature=0.1,
+        max_tokens=1024,
+    )
+
+
+def _build_ollama(settings) -> Ollama:
+    """Health-check Ollama and build its client.
+
+    Raises:
+        ConnectionError: If Ollama is unreachable or the model is missing.
+    """
+    base_url = settings.OLLAMA_BASE_URL
+    model = settings.OLLAMA_MODEL
     
-    if provider == "openai":
-        llm = OpenAI(
-            api_key=settings.OPENAI_API_KEY,
-            api_base=settings.OPENAI_API_BASE,
-            model=settings.LLM_MODEL,
-            temperature=0.1,
-            max_tokens=1024,
-            system_prompt=system_prompt,
+    try:
+        response = _session.get(
+            f"{base_url}/api/tags",
+            timeout=HEALTH_CHECK_TIMEOUT,
         )
-        _llm_cache[cache_key] = llm
-        return llm
+        response.raise_for_status()
+    except (requests.RequestException, requests.Timeout) as e:
+        raise ConnectionError(
+            f"Cannot connect to Ollama at {base_url}. Is Ollama running?"
+        ) from e
     
-    elif provider == "ollama":
-        # Health check for Ollama
-        base_url = settings.OLLAMA_BASE_URL
-        model = settings.OLLAMA_MODEL
+    # Check if model exists
+    try:
+        tags_data = _json_loads(response.content)
+        models = tags_data.get("models", [])
+        model_names = [m.get("name", "") for m in models]
+        available = frozenset(model_names)
         
-        try:
-            response = requests.get(
-                f"{base_url}/api/tags",
-                timeout=2,
-            )
-            response.raise_for_status()
-        except (requests.RequestException, requests.Timeout) as e:
-            raise ConnectionError(
-                f"Cannot connect to Ollama at {base_url}. Is Ollama running?"
-            ) from e
+        # Check for exact match or match with :latest suffix
+        model_found = (
+            model in available or 
+            f"{model}:latest" in available
+        )
         
-        # Check if model exists
-        try:
-            tags_data = response.json()
-            models = tags_data.get("models", [])
-            model_names = [m.get("name", "") for m in models]
-            
-            # Check for exact match or match with :latest suffix
-            model_found = (
-                model in model_names or 
-                f"{model}:latest" in model_names
-            )
-            
-            if not model_names or not model_found:
-                raise ConnectionError(
-                    f"Model '{model}' not found in Ollama. "
-                    f"Available models: {', '.join(model_names) if model_names else 'none'}. "
-                    f"Run: ollama pull {model}"
-                )
-        except ValueError as e:
+        if not model_names or not model_found:
             raise ConnectionError(
-                f"Invalid response from Ollama at {base_url}: {e}"
-            ) from e
-        
-        llm = Ollama(
-            model=model,
-            base_url=base_url,
-            request_timeout=settings.OLLAMA_TIMEOUT,
-            context_window=settings.OLLAMA_CONTEXT_WINDOW,
-            system_prompt=system_prompt,
-        )
-        _llm_cache[cache_key] = llm
-        return llm
+                f"Model '{model}' not found in Ollama. "
+                f"Available models: {', '.join(model_names) if model_names else 'none'}. "
+                f"Run: ollama pull {model}"
+            )
+    except ValueError as e:
+        raise ConnectionError(
+            f"Invalid response from Ollama at {base_url}: {e}"
+        ) from e
     
-    else:
-        raise ValueError(
-            f"Invalid LLM_PROVIDER: {provider}. Must be 'openai' or 'ollama'."
-        )
+    return Ollama(
+        model=model,
+        base_url=base_url,
+        request_timeout=settings.OLLAMA_TIMEOUT,
+        context_window=settings.OLLAMA_CONTEXT_WINDOW,
+    )
+
+
+# Client builders keyed by LLM_PROVIDER; add a provider by registering it here
+_PROVIDER_BUILDERS = {
+    "openai": _build_openai,
+    "ollama": _build_ollama,
+}
+
+# Settings each provider's builder reads; part of the client cache key
+_PROVIDER_SETTINGS = {
+    "openai": ("OPENAI_API_KEY", "OPENAI_API_BASE", "LLM_MODEL"),
+    "ollama": ("OLLAMA_BASE_URL", "OLLAMA_MODEL", "OLLAMA_TIMEOUT", "OLLAMA_CONTEXT_WINDOW"),
+}
@@ -1,10 +1,17 @@
 """Query engine for RAG retrieval."""
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import List
+from typing import Callable, List
 
-from llama_index.core import Settings, VectorStoreIndex
+from llama_index.core import Settings
+from llama_index.core.postprocessor import SentenceTransformerRerank
 from tenacity import retry, stop_after_attempt, wait_exponential
 
+from src.config.settings import get_settings
 from src.retrieval.llm_provider import get_llm
 from src.storage.chroma_store import get_index
 
@@ -27,6 +34,25 @@ RESPONSE RULES:
 - If you're unsure, say so rather than guessing
 """
 
+# Query engine shared across requests, built on first use
+_query_engine = None
+_query_engine_lock = threading.Lock()
+
+# Recent answers keyed by normalized question
+# - QUERY_CACHE_SIZE: max entries kept, least recently used evicted first
+# - QUERY_CACHE_TTL: seconds before an entry is considered stale
+QUERY_CACHE_SIZE = 256
+QUERY_CACHE_TTL = 3600.0
+_query_cache: "OrderedDict[str, tuple[float, QueryResult]]" = OrderedDict()
+_query_cache_lock = threading.Lock()
+
+# Minimum seconds between on_partial calls while an answer streams; chat
+# clients rate-limit message edits to about one per second
+STREAM_UPDATE_INTERVAL = 1.0
+
+_TRAILING_PUNCTUATION_RE = re.compile(r'[?!.,;:\s]+$')
+_WHITESPACE_RE = re.compile(r'\s+')
+
 
 @dataclass
 class Source:
@@ -51,36 +77,129 @@ def configure_llm() -> None:
 
 
 def create_query_engine():
-    """Create LlamaIndex query engine from existing ChromaDB index."""
+    """Create LlamaIndex query engine from existing ChromaDB index.
+
+    When RERANK_MODEL is set, over-fetches RETRIEVAL_TOP_K chunks from
+    ChromaDB and reranks them with a cross-encoder down to RERANK_TOP_N,
+    so only the best few chunks are sent to the LLM.
+    """
+    settings = get_settings()
+
     # Get the existing index from ChromaDB
     index = get_index()
+
+    if settings.RERANK_MODEL:
+        similarity_top_k = settings.RETRIEVAL_TOP_K
+        node_postprocessors = [
+            SentenceTransformerRerank(
+                model=settings.RERANK_MODEL,
+                top_n=settings.RERANK_TOP_N,
+            )
+        ]
+    else:
+        similarity_top_k = settings.RERANK_TOP_N
+        node_postprocessors = []
     
-    # Create query engine with similarity search
+    # Create query engine with similarity search, binding the LLM to this
+    # engine rather than relying on the global Settings.llm
     query_engine = index.as_query_engine(
-        similarity_top_k=5,
+        llm=get_llm(system_prompt=SYSTEM_PROMPT),
+        similarity_top_k=similarity_top_k,
+        node_postprocessors=node_postprocessors,
         response_mode="compact",
+        streaming=True,
     )
     
     return query_engine
 
 
-def query(question: str) -> QueryResult:
+def get_query_engine():
+    """Get the shared query engine, building it on first call.
+
+    Opens the ChromaDB index and binds the LLM only once per process
+    instead of on every query.
+    """
+    global _query_engine
+    if _query_engine is None:
+        with _query_engine_lock:
+            if _query_engine is None:
+                _query_engine = create_query_engine()
+    return _query_engine
+
+
+def normalize_question(question: str) -> str:
+    """Normalize a question for cache lookup.
+
+    Lowercases, collapses whitespace and strips trailing sentence
+    punctuation so trivially different phrasings of the same question share
+    a cache entry. Symbols inside the question are kept, so "C++" and "C"
+    stay distinct.
+    """
+    text = _WHITESPACE_RE.sub(' ', question.lower()).strip()
+    return _TRAILING_PUNCTUATION_RE.sub('', text)
+
+
+def _cache_key(question: str) -> str:
+    return hashlib.sha1(normalize_question(question).encode('utf-8')).hexdigest()
+
+
+def _get_cached_result(key: str) -> QueryResult | None:
+    with _query_cache_lock:
+        entry = _query_cache.get(key)
+        if entry is None:
+            return None
+        stored_at, result = entry
+        if time.monotonic() - stored_at > QUERY_CACHE_TTL:
+            del _query_cache[key]
+            return None
+        _query_cache.move_to_end(key)
+        return result
+
+
+def _store_cached_result(key: str, result: QueryResult) -> None:
+    with _query_cache_lock:
+        _query_cache[key] = (time.monotonic(), result)
+        _query_cache.move_to_end(key)
+        while len(_query_cache) > QUERY_CACHE_SIZE:
+            _query_cache.popitem(last=False)
+
+
+def query(
+    question: str,
+    on_partial: Callable[[str], None] | None = None,
+) -> QueryResult:
     """Query the knowledge base and return answer with sources.
     
+    The answer is streamed from the LLM; `on_partial` is called with the
+    answer text accumulated so far, at most once every
+    STREAM_UPDATE_INTERVAL seconds. Repeated questions are
+    answered from an in-memory cache for up to QUERY_CACHE_TTL seconds
+    without touching ChromaDB or the LLM.
+    
     Args:
         question: User's question
+        on_partial: Optional callback receiving the partial answer text
         
     Returns:
         QueryResult with answer and source citations
     """
-    # Ensure LLM is configured
-    configure_llm()
-    
-    # Create query engine
-    query_engine = create_query_engine()
-    
-    # Execute query
-    response = query_engine.query(question)
+    key = _cache_key(question)
+    cached = _get_cached_result(key)
+    if cached is not None:
+        return cached
+
+    # Execute query against the shared engine, accumulating streamed tokens
+    response = get_query_engine().query(question)
+    answer_parts = []
+    last_partial = 0.0
+    for token in response.response_gen:
+        answer_parts.append(token)
+        if on_partial is not None:
+            # Only join the answer so far when the callback will fire
+            now = time.monotonic()
+            if now - last_partial >= STREAM_UPDATE_INTERVAL:
+                last_partial = now
+                on_partial("".join(answer_parts))
     
     # Extract sources from response
     sources = []
@@ -88,27 +207,34 @@ def query(question: str) -> QueryResult:
         for node in response.source_nodes:
             # Extract metadata from node
             metadata = node.node.metadata if hasattr(node.node, 'metadata') else {}
+            text = node.node.text
             
             source = Source(
-                text_snippet=node.node.text[:200] + "..." if len(node.node.text) > 200 else node.node.text,
+                text_snippet=text[:200] + "..." if len(text) > 200 else text,
                 source_path=metadata.get('source_path', metadata.get('file_path', 'Unknown')),
                 source_type=metadata.get('source_type', 'docs'),
                 score=node.score if hasattr(node, 'score') and node.score is not None else 0.0,
             )
             sources.append(source)
     
-    return QueryResult(
-        answer=str(response),
+    result = QueryResult(
+        answer="".join(answer_parts),
         sources=sources,
     )
+    _store_cached_result(key, result)
+    return result
 
 
 @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=1, max=10))
-def query_with_retry(question: str) -> QueryResult:
+def query_with_retry(
+    question: str,
+    on_partial: Callable[[str], None] | None = None,
+) -> QueryResult:
     """Query with automatic retry on failure.
     
     Args:
         question: User's question
+        on_partial: Optional callback receiving the partial answer text
         
     Returns:
         QueryResult with answer and source citations
@@ -116,4 +242,4 @@ def query_with_retry(question: str) -> QueryResult:
     Raises:
         Exception: If query fails after 3 attempts
     """
-    return query(question)
+    return query(question, on_partial=on_partial)
@@ -1,17 +1,64 @@
 """ChromaDB vector store with persistence and HuggingFace embeddings."""
+import hashlib
 import chromadb
+import torch
 from llama_index.core import VectorStoreIndex, StorageContext, Settings
 from llama_index.core.node_parser import SentenceSplitter
+from llama_index.core.schema import MetadataMode
+from llama_index.core.vector_stores.utils import node_to_metadata_dict
 from llama_index.vector_stores.chroma import ChromaVectorStore
 from llama_index.embeddings.huggingface import HuggingFaceEmbedding
 from src.config.settings import get_settings
 
 _settings = get_settings()
 
-# Configure embeddings globally
-Settings.embed_model = HuggingFaceEmbedding(
-    model_name="BAAI/bge-small-en-v1.5"
-)
+
+def _get_embed_device() -> str:
+    """Pick the fastest available torch device for embeddings."""
+    if torch.cuda.is_available():
+        return "cuda"
+    if torch.backends.mps.is_available():
+        return "mps"
+    return "cpu"
+
+
+def create_embed_model() -> HuggingFaceEmbedding:
+    """Build the BAAI/bge-small-en-v1.5 embedding model from settings.
+
+    - EMBED_BACKEND=torch: PyTorch on the fastest device; fp16 weights on
+      CUDA halve memory bandwidth and use tensor cores
+    - EMBED_BACKEND=onnx: ONNX Runtime, optionally loading the int8
+      quantized export named by EMBED_ONNX_FILE for fast CPU inference
+    """
+    device = _get_embed_device()
+    kwargs = {}
+    if _settings.EMBED_BACKEND == "onnx":
+        kwargs["backend"] = "onnx"
+        if _settings.EMBED_ONNX_FILE:
+            kwargs["model_kwargs"] = {"file_name": _settings.EMBED_ONNX_FILE}
+    elif device == "cuda":
+        kwargs["model_kwargs"] = {"torch_dtype": torch.float16}
+
+    return HuggingFaceEmbedding(
+        model_name="BAAI/bge-small-en-v1.5",
+        device=device,
+        embed_batch_size=_settings.EMBED_BATCH_SIZE,
+        **kwargs,
+    )
+
+
+def get_embed_model():
+    """Return the global embed model, building it on first use.
+
+    Built lazily rather than at import, so importing this module never
+    loads the model weights or contacts the HuggingFace hub. A model
+    already installed in Settings (e.g. by tests) is used as is.
+    """
+    # - output vectors stay float32: ChromaDB's HNSW index stores float32 only,
+    #   so int8-quantizing embeddings client-side would not shrink the index
+    if Settings._embed_model is None:
+        Settings.embed_model = create_embed_model()
+    return Settings.embed_model
 
 # Configure chunking strategy
 # - chunk_size: 1000 chars for good context without too much noise
@@ -21,9 +68,22 @@ Settings.node_parser = SentenceSplitter(
     chunk_overlap=200,
 )
 
+# Number of chunks embedded and written to ChromaDB per collection.add call
+BATCH_SIZE = 200
+
 
 def get_chroma_client():
-    """Get persistent ChromaDB client."""
+    """Get ChromaDB client.
+
+    Uses a ChromaDB server when CHROMA_MODE is "http", so index writes run
+    in the server process instead of this one. Falls back to an in-process
+    persistent client otherwise.
+    """
+    if _settings.CHROMA_MODE == "http":
+        return chromadb.HttpClient(
+            host=_settings.CHROMA_HOST,
+            port=_settings.CHROMA_PORT,
+        )
     return chromadb.PersistentClient(path=_settings.CHROMA_PERSIST_DIR)
 
 
@@ -47,13 +107,105 @@ def get_storage_context():
 def get_index():
     """Get existing index from ChromaDB."""
     vector_store = get_vector_store()
-    return VectorStoreIndex.from_vector_store(vector_store)
+    return VectorStoreIndex.from_vector_store(vector_store, embed_model=get_embed_model())
+
+
+def _chunked(items, size):
+    """Yield successive slices of at most `size` items."""
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _assign_document_ids(documents) -> None:
+    """Give each document a stable ID before it is chunked.
+
+    The ID is the document's source, or a hash of its text when it has
+    none, so chunks' SOURCE relationships survive a reindex.
+    """
+    for doc in documents:
+        source = doc.metadata.get('source')
+        doc.id_ = source or hashlib.sha1(doc.text.encode('utf-8')).hexdigest()
+
+
+def _assign_chunk_ids(nodes) -> None:
+    """Give each chunk a stable ID derived from its document and content.
+
+    IDs have the form "<document id>:<chunk index>:<sha1 prefix>", so an
+    unchanged chunk maps to the same ID on every reindex. The hash covers
+    the embedded text, so any change to what gets embedded changes the ID.
+    PREVIOUS/NEXT relationships are rewritten to the new IDs.
+    """
+    chunk_counts = {}
+    new_ids = {}
+    for node in nodes:
+        doc_id = node.ref_doc_id or ''
+        chunk_idx = chunk_counts.get(doc_id, 0)
+        chunk_counts[doc_id] = chunk_idx + 1
+
+        content = node.get_content(metadata_mode=MetadataMode.EMBED)
+        sha = hashlib.sha1(content.encode('utf-8')).hexdigest()
+        new_ids[node.node_id] = f"{doc_id}:{chunk_idx}:{sha[:12]}"
+        node.id_ = new_ids[node.node_id]
+
+    for node in nodes:
+        for related in node.relationships.values():
+            for info in related if isinstance(related, list) else [related]:
+                info.node_id = new_ids.get(info.node_id, info.node_id)
 
 
 def create_index_from_documents(documents):
-    """Create new index from documents."""
-    storage_context = get_storage_context()
-    return VectorStoreIndex.from_documents(
-        documents,
-        storage_context=storage_context
+    """Create or update the index from documents.
+
+    Documents are chunked up front and given content-hash IDs, so that
+    reindexing unchanged content reuses the stored chunks. Only chunks
+    not already in ChromaDB are embedded, in batches so each batch costs
+    one embedding call and one collection.add. Chunks no longer produced
+    by `documents` are deleted, so the collection mirrors the input.
+    """
+    client = get_chroma_client()
+    collection = client.get_or_create_collection("knowledge_base")
+    batch_size = min(BATCH_SIZE, client.get_max_batch_size())
+    embed_model = get_embed_model()
+
+    _assign_document_ids(documents)
+    nodes = Settings.node_parser.get_nodes_from_documents(documents)
+    _assign_chunk_ids(nodes)
+
+    # Drop chunks that are stale or were indexed under an older ID scheme
+    wanted_ids = {node.node_id for node in nodes}
+    existing_ids = set(collection.get(include=[])['ids'])
+    stale_ids = list(existing_ids - wanted_ids)
+    for batch in _chunked(stale_ids, batch_size):
+        collection.delete(ids=batch)
+
+    # Only embed chunks that aren't already stored
+    new_nodes = [node for node in nodes if node.node_id not in existing_ids]
+
+    # Embed longest chunks first so each model batch holds texts of similar
+    # length; the tokenizer pads to the longest text in a batch, so this
+    # keeps compute spent on padding tokens low
+    new_nodes.sort(
+        key=lambda node: len(node.get_content(metadata_mode=MetadataMode.EMBED)),
+        reverse=True,
     )
+
+    for batch in _chunked(new_nodes, batch_size):
+        embeddings = embed_model.get_text_embedding_batch(
+            [node.get_content(metadata_mode=MetadataMode.EMBED) for node in batch],
+            show_progress=True,
+        )
+
+        metadatas = []
+        for node in batch:
+            metadata = node_to_metadata_dict(node, remove_text=True, flat_metadata=True)
+            metadatas.append({k: "" if v is None else v for k, v in metadata.items()})
+
+        collection.add(
+            ids=[node.node_id for node in batch],
+            embeddings=embeddings,
+            documents=[node.get_content(metadata_mode=MetadataMode.NONE) for node in batch],
+            metadatas=metadatas,
+        )
+
+    vector_store = ChromaVectorStore(chroma_collection=collection)
+    return VectorStoreIndex.from_vector_store(vector_store, embed_model=embed_model)
@@ -1,13 +1,24 @@
 """Pytest fixtures for E2E testing with local LLM."""
 
+import copy
 import os
 import subprocess
 import time
 import pytest
 import requests
+from requests.adapters import HTTPAdapter
 import tempfile
+from contextlib import contextmanager
+from functools import lru_cache
 from typing import List
-from llama_index.core import Document
+from types import SimpleNamespace
+from llama_index.core import Document, Settings
+
+EMBED_MODEL_NAME = "BAAI/bge-small-en-v1.5"
+
+# Shared HTTP session so repeated Ollama probes reuse one connection
+_session = requests.Session()
+_session.mount("http://", HTTPAdapter(pool_connections=2, pool_maxsize=4))
 
 
 def _start_ollama_server() -> bool:
@@ -20,7 +31,7 @@ def _start_ollama_server() -> bool:
     
     # Check if already running
     try:
-        response = requests.get(f"{base_url}/api/tags", timeout=2)
+        response = _session.get(f"{base_url}/api/tags", timeout=2)
         if response.status_code == 200:
             return True
     except (requests.RequestException, requests.Timeout):
@@ -28,9 +39,12 @@ def _start_ollama_server() -> bool:
     
     # Try to start Ollama server
     try:
-        # Start ollama serve in the background
+        # Start ollama serve in the background, allowing concurrent requests
+        # so E2E queries issued together are served in parallel
+        env = {**os.environ, "OLLAMA_NUM_PARALLEL": os.getenv("OLLAMA_NUM_PARALLEL", "2")}
         subprocess.Popen(
             ["ollama", "serve"],
+            env=env,
             stdout=subprocess.DEVNULL,
             stderr=subprocess.DEVNULL,
             start_new_session=True,
@@ -40,7 +54,7 @@ def _start_ollama_server() -> bool:
         for _ in range(30):
             time.sleep(1)
             try:
-                response = requests.get(f"{base_url}/api/tags", timeout=2)
+                response = _session.get(f"{base_url}/api/tags", timeout=2)
                 if response.status_code == 200:
                     return True
             except (requests.RequestException, requests.Timeout):
@@ -52,17 +66,19 @@ def _start_ollama_server() -> bool:
         return False
 
 
+@lru_cache(maxsize=1)
 def is_ollama_available() -> bool:
     """Check if Ollama is running and reachable.
     
     First checks if server is running, then tries to start it if not.
+    The result is memoized so the probe runs once per test session.
     
     Returns:
         bool: True if Ollama API is accessible, False otherwise.
     """
     try:
         base_url = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
-        response = requests.get(f"{base_url}/api/tags", timeout=2)
+        response = _session.get(f"{base_url}/api/tags", timeout=2)
         if response.status_code == 200:
             return True
     except (requests.RequestException, requests.Timeout):
@@ -86,7 +102,7 @@ def _get_ollama_model_name() -> str:
     base_url = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
     
     try:
-        response = requests.get(f"{base_url}/api/tags", timeout=2)
+        response = _session.get(f"{base_url}/api/tags", timeout=2)
         if response.status_code == 200:
             models = response.json().get("models", [])
             model_names = [m.get("name", "") for m in models]
@@ -118,6 +134,24 @@ def pytest_configure(config):
     config.addinivalue_line(
         "markers", "requires_ollama: mark test as requiring Ollama to be running"
     )
+    # Registered here too so the marker is known when pytest-xdist is absent
+    config.addinivalue_line(
+        "markers", "xdist_group(name): run tests in the group on one xdist worker"
+    )
+
+
+@pytest.fixture(autouse=True)
+def _clear_settings():
+    """Drop memoized settings around each test.
+
+    Tests patch the environment with monkeypatch, which is undone after
+    the test; clearing here keeps get_settings() from returning settings
+    built from another test's environment.
+    """
+    from src.config.settings import get_settings
+    get_settings.cache_clear()
+    yield
+    get_settings.cache_clear()
 
 
 @pytest.fixture(scope="session")
@@ -143,6 +177,26 @@ def pytest_runtest_setup(item):
         item.fixturenames.insert(0, "ensure_ollama_running")
 
 
+@contextmanager
+def settings_override(**overrides):
+    """Temporarily set LlamaIndex Settings attributes, then restore them.
+
+    Snapshots the private backing fields so an unset value is restored
+    as unset, without triggering the getters' default-model resolution.
+
+    Args:
+        **overrides: Settings attributes to set, e.g. llm=..., embed_model=...
+    """
+    previous = {name: getattr(Settings, f"_{name}") for name in overrides}
+    for name, value in overrides.items():
+        setattr(Settings, name, value)
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            setattr(Settings, f"_{name}", value)
+
+
 @pytest.fixture
 def ollama_model() -> str:
     """Return configured Ollama model name.
@@ -156,6 +210,115 @@ def ollama_model() -> str:
     return _get_ollama_model_name()
 
 
+@pytest.fixture(scope="module")
+def openai_settings_template():
+    """Module-scoped settings stand-in for the OpenAI provider.
+
+    A SimpleNamespace, since get_llm() only reads attributes. Built
+    once per module; tests get a copy through openai_settings.
+    """
+    return SimpleNamespace(
+        LLM_PROVIDER="openai",
+        OPENAI_API_KEY="test-key",
+        OPENAI_API_BASE="https://api.openai.com/v1",
+        LLM_MODEL="gpt-4",
+    )
+
+
+@pytest.fixture
+def openai_settings(openai_settings_template):
+    """Per-test copy of the OpenAI settings stand-in."""
+    return copy.copy(openai_settings_template)
+
+
+@pytest.fixture(scope="module")
+def ollama_settings_template():
+    """Module-scoped settings stand-in for the Ollama provider.
+
+    A SimpleNamespace, since get_llm() only reads attributes. Built
+    once per module; tests get a copy through ollama_settings.
+    """
+    return SimpleNamespace(
+        LLM_PROVIDER="ollama",
+        OLLAMA_BASE_URL="http://localhost:11434",
+        OLLAMA_MODEL="llama3.2",
+        OLLAMA_TIMEOUT=120.0,
+        OLLAMA_CONTEXT_WINDOW=8192,
+    )
+
+
+@pytest.fixture
+def ollama_settings(ollama_settings_template):
+    """Per-test copy of the Ollama settings stand-in."""
+    return copy.copy(ollama_settings_template)
+
+
+def _embed_model_patterns() -> List[str]:
+    """Files SentenceTransformer loads for EMBED_MODEL_NAME.
+
+    Config, tokenizer and pooling files plus the one weight format in
+    use, instead of every format the hub repo ships.
+    """
+    patterns = ["*.json", "*.txt", "model.safetensors"]
+    if os.getenv("EMBED_BACKEND") == "onnx":
+        patterns.append(f"onnx/{os.getenv('EMBED_ONNX_FILE') or 'model.onnx'}")
+    return patterns
+
+
+@pytest.fixture(scope="session")
+def hf_offline():
+    """Fetch the embedding weights once, then keep huggingface_hub offline.
+
+    With the snapshot cached, HF_HUB_OFFLINE stops huggingface_hub from
+    sending ETag/HEAD requests every time a model is constructed. A warm
+    cache is used without touching the network, so xdist workers don't
+    re-check it. Left online if the hub is unreachable; the environment
+    is restored at the end of the session.
+    """
+    if os.getenv("HF_HUB_OFFLINE"):
+        yield
+        return
+    from huggingface_hub import constants, snapshot_download
+    patterns = _embed_model_patterns()
+    try:
+        snapshot_download(EMBED_MODEL_NAME, allow_patterns=patterns, local_files_only=True)
+    except OSError:
+        try:
+            snapshot_download(EMBED_MODEL_NAME, allow_patterns=patterns)
+        except OSError:
+            yield
+            return
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setenv("HF_HUB_OFFLINE", "1")
+        monkeypatch.setenv("TRANSFORMERS_OFFLINE", "1")
+        # huggingface_hub reads the env var at import time
+        monkeypatch.setattr(constants, "HF_HUB_OFFLINE", True)
+        yield
+
+
+@pytest.fixture(scope="session")
+def bge_embedder(request):
+    """Session-scoped embedding model shared by all tests.
+
+    Uses FastEmbed's quantized ONNX build of the production model when
+    llama-index-embeddings-fastembed is installed; it starts without
+    loading PyTorch and fetches its own weights. Otherwise falls back to
+    the production factory (honouring EMBED_BACKEND), after hf_offline
+    has prefetched that model's files. Built once per session either way.
+
+    Returns:
+        BaseEmbedding: The shared embedding model.
+    """
+    try:
+        from llama_index.embeddings.fastembed import FastEmbedEmbedding
+    except ImportError:
+        from src.storage.chroma_store import create_embed_model
+        # Only the SentenceTransformer path reads the files hf_offline fetches
+        request.getfixturevalue("hf_offline")
+        return create_embed_model()
+    return FastEmbedEmbedding(model_name=EMBED_MODEL_NAME)
+
+
 @pytest.fixture
 def ephemeral_chroma():
     """Create an ephemeral ChromaDB client for test isolation.
@@ -172,12 +335,12 @@ def ephemeral_chroma():
     # Cleanup happens automatically when client goes out of scope
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_documents() -> List[Document]:
     """Sample documents for testing the RAG pipeline.
     
     Provides realistic test data with metadata for document ingestion
-    and retrieval testing.
+    and retrieval testing. Session-scoped; tests must not mutate them.
     
     Returns:
         List[Document]: List of sample LlamaIndex Documents.
@@ -213,3 +376,20 @@ def temp_chroma_dir():
     """
     with tempfile.TemporaryDirectory() as tmpdir:
         yield tmpdir
+
+
+@pytest.fixture(scope="session")
+def sample_index(bge_embedder, sample_documents):
+    """Session-scoped in-memory index over the sample documents.
+
+    Embeds the sample documents once per session so query tests don't
+    re-embed them on every run. The index keeps its own reference to
+    the embedding model for query-time embeddings. Uses LlamaIndex's
+    default in-memory store, an exact flat search, so no ChromaDB client
+    is needed for three documents.
+
+    Returns:
+        VectorStoreIndex: Index built from sample_documents.
+    """
+    from llama_index.core import VectorStoreIndex
+    return VectorStoreIndex.from_documents(sample_documents, embed_model=bge_embedder)
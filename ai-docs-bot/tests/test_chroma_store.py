@@ -0,0 +1,134 @@
+"""Tests for incremental indexing in src.storage.chroma_store."""
+
+import pytest
+from llama_index.core import Document, MockEmbedding
+from llama_index.core.schema import NodeRelationship
+
+from src.storage import chroma_store
+from tests.conftest import settings_override
+
+
+class _CountingEmbedding(MockEmbedding):
+    """MockEmbedding that counts how many texts it embeds."""
+
+    embedded: int = 0
+
+    def _get_text_embeddings(self, texts):
+        self.embedded += len(texts)
+        return super()._get_text_embeddings(texts)
+
+
+@pytest.fixture
+def embed_model():
+    return _CountingEmbedding(embed_dim=8)
+
+
+@pytest.fixture
+def collection(monkeypatch, ephemeral_chroma, embed_model):
+    """The knowledge_base collection in an in-memory ChromaDB."""
+    monkeypatch.setattr(chroma_store, "get_chroma_client", lambda: ephemeral_chroma)
+    with settings_override(embed_model=embed_model):
+        yield ephemeral_chroma.get_or_create_collection("knowledge_base")
+    # EphemeralClient instances share state within a process
+    ephemeral_chroma.delete_collection("knowledge_base")
+
+
+def _documents(*names, file_dir="/tmp/repo_a"):
+    """One document per name, as loaded from a fresh clone in file_dir."""
+    documents = []
+    for name in names:
+        doc = Document(
+            text=f"Contents of {name}. " * 20,
+            metadata={"source": f"repo/{name}", "file_path": f"{file_dir}/{name}"},
+        )
+        doc.excluded_embed_metadata_keys.append("file_path")
+        documents.append(doc)
+    return documents
+
+
+class TestIncrementalIndexing:
+    def test_adds_new_chunks(self, collection, embed_model):
+        chroma_store.create_index_from_documents(_documents("a.py", "b.py"))
+
+        assert collection.count() == 2
+        assert embed_model.embedded == 2
+
+    def test_skips_unchanged_chunks(self, collection, embed_model):
+        chroma_store.create_index_from_documents(_documents("a.py", "b.py"))
+        ids = set(collection.get(include=[])["ids"])
+
+        # A reindex clones into a new temp dir; nothing should be re-embedded
+        chroma_store.create_index_from_documents(
+            _documents("a.py", "b.py", file_dir="/tmp/repo_b")
+        )
+
+        assert set(collection.get(include=[])["ids"]) == ids
+        assert embed_model.embedded == 2
+
+    def test_reembeds_changed_chunks(self, collection, embed_model):
+        chroma_store.create_index_from_documents(_documents("a.py"))
+        changed = _documents("a.py")
+        changed[0].set_content("New contents of a.py.")
+
+        chroma_store.create_index_from_documents(changed)
+
+        assert collection.count() == 1
+        assert embed_model.embedded == 2
+
+    def test_deletes_stale_chunks(self, collection):
+        chroma_store.create_index_from_documents(_documents("a.py", "b.py"))
+
+        chroma_store.create_index_from_documents(_documents("a.py"))
+
+        ids = collection.get(include=[])["ids"]
+        assert len(ids) == 1
+        assert ids[0].startswith("repo/a.py:")
+
+    def test_ids_stable_without_source(self, collection):
+        documents = [Document(text="No source metadata here.")]
+        chroma_store.create_index_from_documents(documents)
+        ids = collection.get(include=[])["ids"]
+
+        chroma_store.create_index_from_documents([Document(text="No source metadata here.")])
+
+        assert collection.get(include=[])["ids"] == ids
+
+
+class TestChunkIds:
+    def test_relationships_point_at_assigned_ids(self):
+        documents = _documents("long.md")
+        documents[0].set_content("A sentence about indexing. " * 200)
+        chroma_store._assign_document_ids(documents)
+        nodes = chroma_store.Settings.node_parser.get_nodes_from_documents(documents)
+
+        chroma_store._assign_chunk_ids(nodes)
+
+        assert len(nodes) > 1
+        first, second = nodes[0], nodes[1]
+        assert first.relationships[NodeRelationship.NEXT].node_id == second.node_id
+        assert second.relationships[NodeRelationship.PREVIOUS].node_id == first.node_id
+        assert first.ref_doc_id == "repo/long.md"
+
+
+class TestEmbedModel:
+    def test_uses_installed_model_without_building(self, monkeypatch, embed_model):
+        def fail():
+            raise AssertionError("create_embed_model should not be called")
+
+        monkeypatch.setattr(chroma_store, "create_embed_model", fail)
+        with settings_override(embed_model=embed_model):
+            assert chroma_store.get_embed_model() is embed_model
+
+    def test_builds_model_once_on_first_use(self, monkeypatch, embed_model):
+        calls = []
+
+        def build():
+            calls.append(1)
+            return embed_model
+
+        monkeypatch.setattr(chroma_store, "create_embed_model", build)
+        monkeypatch.setattr(chroma_store.Settings, "_embed_model", None)
+
+        assert chroma_store.get_embed_model() is embed_model
+        assert chroma_store.get_embed_model() is embed_model
+        assert calls == [1]
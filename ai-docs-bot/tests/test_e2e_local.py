@@ -1,42 +1,87 @@
 """E2E tests for local LLM pipeline with Ollama."""
 
-import os
+import asyncio
 import pytest
 from unittest.mock import Mock, patch
-from llama_index.core import VectorStoreIndex, Settings
-from llama_index.embeddings.huggingface import HuggingFaceEmbedding
 
-from tests.conftest import requires_ollama, is_ollama_available
-from src.retrieval.llm_provider import get_llm, _llm_cache
+from tests.conftest import requires_ollama, is_ollama_available, settings_override
+from src.config.settings import get_settings
+from src.retrieval.llm_provider import get_llm, _client_cache, _llm_cache
 
+# Seconds allowed for both concurrent Ollama generations together
+OLLAMA_QUERIES_TIMEOUT = 45
 
-@pytest.mark.timeout(300)
+
+def _set_llm_provider(monkeypatch, provider: str) -> None:
+    """Set LLM_PROVIDER and drop memoized settings so get_llm() sees it."""
+    monkeypatch.setenv("LLM_PROVIDER", provider)
+    get_settings.cache_clear()
+
+
+@pytest.fixture(scope="module")
+def ollama_responses(sample_index):
+    """Run the Ollama pipeline queries concurrently, once per module.
+
+    Both queries go through one query engine, so they share a system
+    prompt and Ollama can reuse the evaluated prompt prefix. They are
+    issued together with aquery + asyncio.gather so their round trips
+    overlap instead of running back to back. The generations are bounded
+    by OLLAMA_QUERIES_TIMEOUT, separately from building sample_index, so a
+    cold embedding model doesn't eat into a hung Ollama's budget.
+
+    Returns:
+        dict: Query responses keyed by "python" and "fastapi".
+    """
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        _set_llm_provider(monkeypatch, "ollama")
+        query_engine = sample_index.as_query_engine(
+            llm=get_llm(system_prompt="Answer questions based on the provided context."),
+            similarity_top_k=3,
+            response_mode="compact",
+        )
+
+        async def _run_queries():
+            return await asyncio.wait_for(
+                asyncio.gather(
+                    query_engine.aquery("What is Python?"),
+                    query_engine.aquery("Tell me about FastAPI"),
+                ),
+                timeout=OLLAMA_QUERIES_TIMEOUT,
+            )
+
+        python_response, fastapi_response = asyncio.run(_run_queries())
+    get_settings.cache_clear()
+
+    return {"python": python_response, "fastapi": fastapi_response}
+
+
+@pytest.mark.xdist_group("ollama")
 class TestLocalLLMPipeline:
-    """E2E tests for the RAG pipeline with local Ollama LLM."""
+    """E2E tests for the RAG pipeline with local Ollama LLM.
+
+    Timeouts are per test so a hung Ollama call fails fast. They cover the
+    test body only (func_only), not fixture setup such as loading the
+    embedding model; the Ollama generations made in ollama_responses are
+    bounded there by OLLAMA_QUERIES_TIMEOUT.
+    """
 
     @requires_ollama
-    def test_ollama_connection(self):
+    @pytest.mark.timeout(10, func_only=True)
+    def test_ollama_connection(self, monkeypatch):
         """Test that Ollama is reachable and configured model exists."""
         # This test verifies the connection check works
         assert is_ollama_available(), "Ollama should be available for this test"
         
         # Verify we can get an LLM instance
-        os.environ["LLM_PROVIDER"] = "ollama"
-        try:
-            llm = get_llm(system_prompt="You are a test assistant.")
-            assert llm is not None
-            assert hasattr(llm, 'complete')  # LlamaIndex LLM interface
-        finally:
-            os.environ["LLM_PROVIDER"] = "openai"  # Reset
+        _set_llm_provider(monkeypatch, "ollama")
+        llm = get_llm(system_prompt="You are a test assistant.")
+        assert llm is not None
+        assert hasattr(llm, 'complete')  # LlamaIndex LLM interface
 
     @requires_ollama
+    @pytest.mark.timeout(10, func_only=True)
     def test_document_ingestion(self, ephemeral_chroma, sample_documents):
         """Test ingesting documents into ephemeral ChromaDB."""
-        # Set up embeddings (same as production)
-        Settings.embed_model = HuggingFaceEmbedding(
-            model_name="BAAI/bge-small-en-v1.5"
-        )
-        
         # Create a collection in ephemeral chroma
         collection = ephemeral_chroma.create_collection("test_docs")
         
@@ -47,79 +92,45 @@ class TestLocalLLMPipeline:
             assert doc.metadata.get("source_path")
 
     @requires_ollama
-    def test_query_with_local_llm(self, ephemeral_chroma, sample_documents):
+    @pytest.mark.timeout(10, func_only=True)
+    @pytest.mark.parametrize("topic, related_terms", [
+        ("python", [
+            "python", "programming", "language", "guido",  # Direct terms
+            "1991", "simplicity", "readability", "created",  # From context
+        ]),
+        ("fastapi", [
+            "fastapi", "framework", "api", "web",  # Direct terms
+            "openapi", "documentation", "performance",  # From context
+        ]),
+    ])
+    def test_query_with_local_llm(self, ollama_responses, topic, related_terms):
         """Test full pipeline: ingest -> query -> verify response."""
-        # Set up for local LLM
-        os.environ["LLM_PROVIDER"] = "ollama"
+        response = ollama_responses[topic]
         
-        try:
-            # Configure embeddings
-            Settings.embed_model = HuggingFaceEmbedding(
-                model_name="BAAI/bge-small-en-v1.5"
-            )
-            
-            # Configure LLM
-            Settings.llm = get_llm(system_prompt="Answer questions based on the provided context.")
-            
-            # Create index from sample documents
-            index = VectorStoreIndex.from_documents(sample_documents)
-            
-            # Create query engine
-            query_engine = index.as_query_engine(
-                similarity_top_k=3,
-                response_mode="compact",
-            )
-            
-            # Execute query
-            response = query_engine.query("What is Python?")
-            
-            # Verify response exists and is non-empty
-            answer = str(response)
-            assert answer, "Response should not be empty"
-            assert len(answer) > 10, "Response should have meaningful content"
-            
-            # Semantic check: response should relate to the question
-            # (checking for any related terms due to LLM variability)
-            answer_lower = answer.lower()
-            related_terms = [
-                "python", "programming", "language", "guido",  # Direct terms
-                "1991", "simplicity", "readability", "created",  # From context
-            ]
-            assert any(word in answer_lower for word in related_terms), \
-                f"Response should mention Python-related terms: {answer}"
-                
-        finally:
-            os.environ["LLM_PROVIDER"] = "openai"  # Reset
+        # Verify response exists and is non-empty
+        answer = response.response or ""
+        assert answer, "Response should not be empty"
+        assert len(answer) > 10, "Response should have meaningful content"
+        
+        # Semantic check: response should relate to the question
+        # (checking for any related terms due to LLM variability)
+        answer_lower = answer.lower()
+        assert any(word in answer_lower for word in related_terms), \
+            f"Response should mention {topic}-related terms: {answer}"
 
     @requires_ollama
-    def test_response_includes_sources(self, sample_documents):
+    @pytest.mark.timeout(10, func_only=True)
+    def test_response_includes_sources(self, ollama_responses):
         """Test that query responses include source citations."""
-        os.environ["LLM_PROVIDER"] = "ollama"
+        response = ollama_responses["fastapi"]
         
-        try:
-            # Configure embeddings and LLM
-            Settings.embed_model = HuggingFaceEmbedding(
-                model_name="BAAI/bge-small-en-v1.5"
-            )
-            Settings.llm = get_llm(system_prompt="Answer questions based on context.")
-            
-            # Create index and query engine
-            index = VectorStoreIndex.from_documents(sample_documents)
-            query_engine = index.as_query_engine(similarity_top_k=3)
-            
-            # Execute query
-            response = query_engine.query("Tell me about FastAPI")
-            
-            # Verify sources are returned
-            assert hasattr(response, 'source_nodes'), "Response should have source_nodes"
-            assert len(response.source_nodes) > 0, "Should have at least one source"
-            
-            # Verify source has expected metadata
-            first_source = response.source_nodes[0]
-            assert hasattr(first_source, 'node'), "Source should have node"
-            
-        finally:
-            os.environ["LLM_PROVIDER"] = "openai"  # Reset
+        # Verify sources are returned
+        assert hasattr(response, 'source_nodes'), "Response should have source_nodes"
+        assert len(response.source_nodes) > 0, "Should have at least one source"
+        
+        # Verify source has expected metadata
+        first_source = response.source_nodes[0]
+        assert hasattr(first_source, 'node'), "Source should have node"
 
 
 class TestProviderSwitching:
@@ -132,68 +143,79 @@ class TestProviderSwitching:
         # Default when env not set should be openai
         assert settings.LLM_PROVIDER in ["openai", "ollama"]
 
-    def test_invalid_provider_raises_error(self):
+    def test_invalid_provider_raises_error(self, monkeypatch):
         """Test that invalid provider raises ValueError."""
-        os.environ["LLM_PROVIDER"] = "invalid_provider"
+        _set_llm_provider(monkeypatch, "invalid_provider")
         
-        try:
-            # Clear the cache to force re-evaluation
-            from src.retrieval import llm_provider
-            llm_provider._llm_cache.clear()
-            
-            with pytest.raises(ValueError) as exc_info:
-                get_llm()
-            
-            assert "invalid_provider" in str(exc_info.value).lower()
-            assert "openai" in str(exc_info.value).lower() or "ollama" in str(exc_info.value).lower()
-        finally:
-            os.environ["LLM_PROVIDER"] = "openai"
-            llm_provider._llm_cache.clear()
+        # Clear the cache to force re-evaluation
+        _llm_cache.clear()
+        
+        with pytest.raises(ValueError) as exc_info:
+            get_llm()
+        
+        assert "invalid_provider" in str(exc_info.value).lower()
+        assert "openai" in str(exc_info.value).lower() or "ollama" in str(exc_info.value).lower()
 
 
 class TestCacheIsolation:
     """Tests for LLM cache isolation and reuse."""
 
-    def setup_method(self):
-        """Clear cache before each test."""
+    @pytest.fixture(autouse=True)
+    def _clean_llm_cache(self, monkeypatch):
+        """Start each test on the openai provider with empty LLM caches."""
+        monkeypatch.setenv("LLM_PROVIDER", "openai")
+        _client_cache.clear()
         _llm_cache.clear()
-
-    def teardown_method(self):
-        """Clean up cache after each test."""
+        yield
+        _client_cache.clear()
         _llm_cache.clear()
-        os.environ["LLM_PROVIDER"] = "openai"
 
-    def test_cache_cleared_between_provider_switches(self):
-        """Test that cache.clear() properly resets state when switching providers."""
+    def test_cache_cleared_between_provider_switches(self, monkeypatch):
+        """Test that clearing the client cache properly resets state when switching providers."""
         # Get OpenAI LLM (mocked, no real API call)
         with patch('src.retrieval.llm_provider.OpenAI') as mock_openai:
             mock_openai_instance = Mock()
             mock_openai.return_value = mock_openai_instance
             
-            os.environ["LLM_PROVIDER"] = "openai"
+            _set_llm_provider(monkeypatch, "openai")
             llm1 = get_llm(system_prompt="Prompt 1")
             
-            # Cache should have one entry
+            # Each cache should have one entry
+            assert len(_client_cache) == 1
             assert len(_llm_cache) == 1
             
-            # Clear cache
+            # Clearing the LLM cache also drops the clients
             _llm_cache.clear()
-            assert len(_llm_cache) == 0
+            assert len(_client_cache) == 0
             
-            # Get again - should create new instance
             llm2 = get_llm(system_prompt="Prompt 1")
             
-            # Should have called OpenAI constructor twice (once for each get_llm)
+            # Should have called OpenAI constructor twice (once per cleared cache)
             assert mock_openai.call_count == 2
+            assert len(_client_cache) == 1
             assert len(_llm_cache) == 1
 
-    def test_multiple_queries_use_cached_llm(self):
+    def test_changed_settings_build_new_client(self, monkeypatch):
+        """Test that a settings change picked up by get_settings() builds a new client."""
+        with patch('src.retrieval.llm_provider.OpenAI') as mock_openai:
+            _set_llm_provider(monkeypatch, "openai")
+            get_llm(system_prompt="Prompt 1")
+            
+            monkeypatch.setenv("OPENAI_API_BASE", "http://localhost:8000/v1")
+            get_settings.cache_clear()
+            get_llm(system_prompt="Prompt 1")
+            
+            assert mock_openai.call_count == 2
+            assert mock_openai.call_args.kwargs["api_base"] == "http://localhost:8000/v1"
+            assert len(_client_cache) == 2
+
+    def test_multiple_queries_use_cached_llm(self, monkeypatch):
         """Verify second query reuses cached LLM (check _llm_cache length doesn't increase)."""
         with patch('src.retrieval.llm_provider.OpenAI') as mock_openai:
             mock_openai_instance = Mock()
             mock_openai.return_value = mock_openai_instance
             
-            os.environ["LLM_PROVIDER"] = "openai"
+            _set_llm_provider(monkeypatch, "openai")
             
             # First query
             llm1 = get_llm(system_prompt="Test prompt")
@@ -211,98 +233,59 @@ class TestCacheIsolation:
             # Constructor should only be called once
             assert mock_openai.call_count == 1
             
-            # Different system prompt creates different cache entry
+            # Different system prompt creates a cache entry over the same client
             llm3 = get_llm(system_prompt="Different prompt")
             assert len(_llm_cache) == 2
-            assert mock_openai.call_count == 2
+            assert len(_client_cache) == 1
+            assert mock_openai.call_count == 1
 
 
 class TestEdgeCases:
     """Tests for edge cases and error handling."""
 
-    def setup_method(self):
-        """Set up test environment."""
-        _llm_cache.clear()
-        os.environ["LLM_PROVIDER"] = "openai"
-
-    def teardown_method(self):
-        """Clean up test environment."""
-        _llm_cache.clear()
-        os.environ["LLM_PROVIDER"] = "openai"
+    @pytest.fixture(scope="class", autouse=True)
+    @classmethod
+    def _mocked_llm(cls):
+        """Install one MockLLM for the whole class to avoid real API calls."""
+        from llama_index.core.llms.mock import MockLLM
+        with settings_override(llm=MockLLM()):
+            yield
 
-    def test_empty_query_handling(self, ephemeral_chroma, sample_documents):
+    def test_empty_query_handling(self, sample_index):
         """Test that empty query doesn't crash and returns some response."""
-        # Configure embeddings
-        Settings.embed_model = HuggingFaceEmbedding(
-            model_name="BAAI/bge-small-en-v1.5"
-        )
+        # Query the shared sample index
+        query_engine = sample_index.as_query_engine(similarity_top_k=3)
         
-        # Mock the LLM to avoid real API calls
-        with patch('src.retrieval.llm_provider.OpenAI') as mock_openai_class:
-            from llama_index.core.llms.mock import MockLLM
-            mock_llm = MockLLM()
-            mock_openai_class.return_value = mock_llm
-            
-            Settings.llm = get_llm(system_prompt="Answer questions based on context.")
-            
-            # Create index from sample documents
-            index = VectorStoreIndex.from_documents(sample_documents)
-            query_engine = index.as_query_engine(similarity_top_k=3)
-            
-            # Execute query with a very short query (edge case for minimal text)
-            # Empty string causes embedding issues, so use a single character instead
-            response = query_engine.query("?")
-            
-            # Should not crash and should return something
-            answer = str(response)
-            assert answer is not None
-            assert isinstance(answer, str)
+        # Execute query with a very short query (edge case for minimal text)
+        # Empty string causes embedding issues, so use a single character instead
+        response = query_engine.query("?")
+        
+        # Should not crash and should return something
+        answer = response.response or ""
+        assert answer is not None
+        assert isinstance(answer, str)
 
-    def test_query_with_special_characters(self, ephemeral_chroma, sample_documents):
+    def test_query_with_special_characters(self, sample_index):
         """Test that query with special characters doesn't cause errors."""
-        Settings.embed_model = HuggingFaceEmbedding(
-            model_name="BAAI/bge-small-en-v1.5"
-        )
+        query_engine = sample_index.as_query_engine(similarity_top_k=3)
         
-        with patch('src.retrieval.llm_provider.OpenAI') as mock_openai_class:
-            from llama_index.core.llms.mock import MockLLM
-            mock_llm = MockLLM()
-            mock_openai_class.return_value = mock_llm
-            
-            Settings.llm = get_llm(system_prompt="Answer questions.")
-            
-            index = VectorStoreIndex.from_documents(sample_documents)
-            query_engine = index.as_query_engine(similarity_top_k=3)
-            
-            # Query with special characters: quotes, newlines, escape sequences
-            special_query = 'What is "Python"?\nWhy use it? \\ @ # $ %'
-            response = query_engine.query(special_query)
-            
-            # Should handle special characters gracefully
-            answer = str(response)
-            assert answer is not None
-            assert len(answer) > 0
+        # Query with special characters: quotes, newlines, escape sequences
+        special_query = 'What is "Python"?\nWhy use it? \\ @ # $ %'
+        response = query_engine.query(special_query)
+        
+        # Should handle special characters gracefully
+        answer = response.response or ""
+        assert answer is not None
+        assert len(answer) > 0
 
-    def test_large_response_handling(self, ephemeral_chroma, sample_documents):
+    def test_large_response_handling(self, sample_index):
         """Test that queries producing longer responses don't cause truncation errors."""
-        Settings.embed_model = HuggingFaceEmbedding(
-            model_name="BAAI/bge-small-en-v1.5"
-        )
+        query_engine = sample_index.as_query_engine(similarity_top_k=3)
         
-        with patch('src.retrieval.llm_provider.OpenAI') as mock_openai_class:
-            from llama_index.core.llms.mock import MockLLM
-            mock_llm = MockLLM()
-            mock_openai_class.return_value = mock_llm
-            
-            Settings.llm = get_llm(system_prompt="Provide detailed answers.")
-            
-            index = VectorStoreIndex.from_documents(sample_documents)
-            query_engine = index.as_query_engine(similarity_top_k=3)
-            
-            # Query that expects a long response
-            response = query_engine.query("Explain Python in detail.")
-            
-            # Response should not be truncated
-            answer = str(response)
-            assert answer is not None
-            assert len(answer) > 0
+        # Query that expects a long response
+        response = query_engine.query("Explain Python in detail.")
+        
+        # Response should not be truncated
+        answer = response.response or ""
+        assert answer is not None
+        assert len(answer) > 0
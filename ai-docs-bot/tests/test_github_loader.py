@@ -0,0 +1,119 @@
+"""Tests for src.ingestion.github_loader."""
+
+import os
+
+from llama_index.core import Document
+from llama_index.core.schema import MetadataMode
+
+from src.ingestion import github_loader
+
+
+def _write(root, rel_path, text="content"):
+    path = root / rel_path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+    return path
+
+
+class TestIncludedExtension:
+    def test_matches_included_extension(self):
+        assert github_loader._has_included_extension("src/app.py")
+
+    def test_ignores_extension_case(self):
+        assert github_loader._has_included_extension("docs/README.MD")
+
+    def test_rejects_other_extensions(self):
+        assert not github_loader._has_included_extension("logo.png")
+
+    def test_bare_dotfile_has_no_extension(self):
+        assert not github_loader._has_included_extension(".md")
+        assert not github_loader._has_included_extension("docs/.md")
+        assert github_loader._has_included_extension("docs/.notes.md")
+
+
+class TestShouldIncludeFile:
+    def test_includes_matching_file(self, tmp_path):
+        assert github_loader.should_include_file(str(_write(tmp_path, "src/app.py")))
+
+    def test_excludes_whole_directory_components(self, tmp_path):
+        assert not github_loader.should_include_file(str(_write(tmp_path, "env/app.py")))
+        assert not github_loader.should_include_file(str(_write(tmp_path, "a/node_modules/b.js")))
+
+    def test_keeps_names_that_only_contain_excluded_dirs(self, tmp_path):
+        assert github_loader.should_include_file(str(_write(tmp_path, "environment/app.py")))
+        assert github_loader.should_include_file(str(_write(tmp_path, "src/builder.py")))
+
+    def test_ignores_extension_case(self, tmp_path):
+        assert github_loader.should_include_file(str(_write(tmp_path, "README.MD")))
+
+    def test_excludes_large_files(self, tmp_path):
+        path = _write(tmp_path, "big.txt", "x" * (github_loader.MAX_FILE_SIZE + 1))
+        assert not github_loader.should_include_file(str(path))
+
+
+class TestIterRepoFiles:
+    def test_yields_included_files_only(self, tmp_path):
+        _write(tmp_path, "src/app.py")
+        _write(tmp_path, "docs/guide.md")
+        _write(tmp_path, "logo.png")
+
+        found = sorted(github_loader._iter_repo_files(str(tmp_path)))
+
+        assert found == [str(tmp_path / "docs/guide.md"), str(tmp_path / "src/app.py")]
+
+    def test_prunes_excluded_directories(self, tmp_path, monkeypatch):
+        _write(tmp_path, "src/app.py")
+        _write(tmp_path, "node_modules/pkg/index.js")
+        _write(tmp_path, "environment/settings.py")
+        scanned = []
+        real_scandir = os.scandir
+
+        def recording_scandir(path):
+            scanned.append(path)
+            return real_scandir(path)
+
+        monkeypatch.setattr(github_loader.os, "scandir", recording_scandir)
+
+        found = sorted(github_loader._iter_repo_files(str(tmp_path)))
+
+        assert found == [str(tmp_path / "environment/settings.py"), str(tmp_path / "src/app.py")]
+        assert not any("node_modules" in path for path in scanned)
+
+
+class TestLoadGithubRepo:
+    def test_clone_path_kept_out_of_embedded_text(self, tmp_path, monkeypatch):
+        _write(tmp_path, "src/app.py", "print('hello')")
+        monkeypatch.setattr(github_loader, "clone_repo", lambda repo_url: str(tmp_path))
+
+        [doc] = github_loader.load_github_repo("https://github.com/org/repo")
+
+        assert doc.metadata["source"] == "repo/src/app.py"
+        embedded = doc.get_content(metadata_mode=MetadataMode.EMBED)
+        assert str(tmp_path) not in embedded
+        assert "repo/src/app.py" in embedded
+
+    def test_walk_advances_with_reads(self, monkeypatch):
+        max_workers = 2
+        paths = [f"/repo/file{i}.py" for i in range(20)]
+        completed = []
+        lag = []
+
+        def walk(repo_dir):
+            for i, path in enumerate(paths):
+                # Batches still unread when the walk yields path i
+                lag.append(i - len(completed))
+                yield path
+
+        def load_files(batch):
+            completed.append(batch)
+            return [Document(text=path, metadata={"file_path": path}) for path in batch]
+
+        monkeypatch.setattr(github_loader, "clone_repo", lambda repo_url: "/repo")
+        monkeypatch.setattr(github_loader, "_iter_repo_files", walk)
+        monkeypatch.setattr(github_loader, "_load_files", load_files)
+        monkeypatch.setattr(github_loader, "FILE_BATCH_SIZE", 1)
+
+        documents = github_loader.load_github_repo("https://github.com/org/repo", max_workers)
+
+        assert [doc.text for doc in documents] == paths
+        assert max(lag) <= max_workers
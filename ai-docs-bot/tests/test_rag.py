@@ -1,8 +1,8 @@
 # tests/test_rag.py
 import pytest
-from src.retrieval.query_engine import QueryResult, Source
+from src.retrieval.query_engine import QueryResult, Source, _cache_key, normalize_question
 from src.bot.responses import format_response
-from src.ingestion.github_loader import should_include_file, INCLUDE_EXTENSIONS
+from src.ingestion.github_loader import INCLUDE_EXTENSIONS
 
 class TestQueryResult:
     def test_query_result_creation(self):
@@ -13,6 +13,18 @@ class TestQueryResult:
         assert result.answer == "Test answer"
         assert len(result.sources) == 1
 
+class TestQuestionNormalization:
+    def test_ignores_case_punctuation_and_whitespace(self):
+        assert normalize_question("How do I configure X?") == normalize_question("  how do i   configure x ")
+
+    def test_different_questions_differ(self):
+        assert normalize_question("What is X?") != normalize_question("What is Y?")
+
+    def test_symbols_inside_question_are_kept(self):
+        assert _cache_key("What is C++?") != _cache_key("What is C?")
+        assert _cache_key("What is C#?") != _cache_key("What is C?")
+        assert normalize_question("a/b") != normalize_question("a b")
+
 class TestResponseFormatting:
     def test_format_response_with_sources(self):
         result = QueryResult(
@@ -1,91 +1,142 @@
 """Unit tests for LLM settings in src.config.settings module."""
 
 import unittest
-from unittest.mock import patch
+
+import pytest
 from src.config.settings import get_settings
 
 
 class TestLLMSettings(unittest.TestCase):
     """Test suite for LLM-related settings fields."""
 
+    def setUp(self):
+        """Patch env vars through monkeypatch, so only the keys set are restored."""
+        self.monkeypatch = pytest.MonkeyPatch()
+
+    def tearDown(self):
+        """Restore the patched environment variables."""
+        self.monkeypatch.undo()
+
     def test_llm_provider_default_is_openai(self):
         """Test default value for LLM_PROVIDER is 'openai'."""
-        with patch.dict("os.environ", {}, clear=False):
-            settings = get_settings()
-            self.assertEqual(settings.LLM_PROVIDER, "openai")
+        settings = get_settings()
+        self.assertEqual(settings.LLM_PROVIDER, "openai")
 
     def test_ollama_model_default_is_llama3_2(self):
         """Test default value for OLLAMA_MODEL is 'llama3.2'."""
-        with patch.dict("os.environ", {}, clear=False):
-            settings = get_settings()
-            self.assertEqual(settings.OLLAMA_MODEL, "llama3.2")
+        settings = get_settings()
+        self.assertEqual(settings.OLLAMA_MODEL, "llama3.2")
 
     def test_ollama_base_url_default(self):
         """Test default value for OLLAMA_BASE_URL is 'http://localhost:11434'."""
-        with patch.dict("os.environ", {}, clear=False):
-            settings = get_settings()
-            self.assertEqual(settings.OLLAMA_BASE_URL, "http://localhost:11434")
+        settings = get_settings()
+        self.assertEqual(settings.OLLAMA_BASE_URL, "http://localhost:11434")
 
     def test_ollama_timeout_default_is_120_0_float(self):
         """Test default value for OLLAMA_TIMEOUT is 120.0 (float type)."""
-        with patch.dict("os.environ", {}, clear=False):
-            settings = get_settings()
-            self.assertEqual(settings.OLLAMA_TIMEOUT, 120.0)
-            self.assertIsInstance(settings.OLLAMA_TIMEOUT, float)
+        settings = get_settings()
+        self.assertEqual(settings.OLLAMA_TIMEOUT, 120.0)
+        self.assertIsInstance(settings.OLLAMA_TIMEOUT, float)
 
     def test_ollama_context_window_default_is_8192_int(self):
         """Test default value for OLLAMA_CONTEXT_WINDOW is 8192 (int type)."""
-        with patch.dict("os.environ", {}, clear=False):
-            settings = get_settings()
-            self.assertEqual(settings.OLLAMA_CONTEXT_WINDOW, 8192)
-            self.assertIsInstance(settings.OLLAMA_CONTEXT_WINDOW, int)
+        settings = get_settings()
+        self.assertEqual(settings.OLLAMA_CONTEXT_WINDOW, 8192)
+        self.assertIsInstance(settings.OLLAMA_CONTEXT_WINDOW, int)
 
     def test_ollama_timeout_correctly_cast_to_float(self):
         """Test OLLAMA_TIMEOUT is correctly cast to float type."""
-        with patch.dict("os.environ", {"OLLAMA_TIMEOUT": "45.5"}, clear=False):
-            settings = get_settings()
-            self.assertEqual(settings.OLLAMA_TIMEOUT, 45.5)
-            self.assertIsInstance(settings.OLLAMA_TIMEOUT, float)
+        self.monkeypatch.setenv("OLLAMA_TIMEOUT", "45.5")
+        settings = get_settings()
+        self.assertEqual(settings.OLLAMA_TIMEOUT, 45.5)
+        self.assertIsInstance(settings.OLLAMA_TIMEOUT, float)
 
     def test_ollama_context_window_correctly_cast_to_int(self):
         """Test OLLAMA_CONTEXT_WINDOW is correctly cast to int type."""
-        with patch.dict("os.environ", {"OLLAMA_CONTEXT_WINDOW": "16384"}, clear=False):
-            settings = get_settings()
-            self.assertEqual(settings.OLLAMA_CONTEXT_WINDOW, 16384)
-            self.assertIsInstance(settings.OLLAMA_CONTEXT_WINDOW, int)
+        self.monkeypatch.setenv("OLLAMA_CONTEXT_WINDOW", "16384")
+        settings = get_settings()
+        self.assertEqual(settings.OLLAMA_CONTEXT_WINDOW, 16384)
+        self.assertIsInstance(settings.OLLAMA_CONTEXT_WINDOW, int)
+
+    def test_query_pool_size_default_is_8_int(self):
+        """Test default value for QUERY_POOL_SIZE is 8 (int type)."""
+        settings = get_settings()
+        self.assertEqual(settings.QUERY_POOL_SIZE, 8)
+        self.assertIsInstance(settings.QUERY_POOL_SIZE, int)
+
+    def test_warm_on_start_default_is_true(self):
+        """Test default value for WARM_ON_START is True."""
+        settings = get_settings()
+        self.assertIs(settings.WARM_ON_START, True)
+
+    def test_warm_on_start_env_override(self):
+        """Test WARM_ON_START=false disables startup warmup."""
+        self.monkeypatch.setenv("WARM_ON_START", "false")
+        settings = get_settings()
+        self.assertIs(settings.WARM_ON_START, False)
+
+    def test_embed_batch_size_default_is_128_int(self):
+        """Test default value for EMBED_BATCH_SIZE is 128 (int type)."""
+        settings = get_settings()
+        self.assertEqual(settings.EMBED_BATCH_SIZE, 128)
+        self.assertIsInstance(settings.EMBED_BATCH_SIZE, int)
+
+    def test_embed_backend_default_is_torch(self):
+        """Test default value for EMBED_BACKEND is 'torch'."""
+        settings = get_settings()
+        self.assertEqual(settings.EMBED_BACKEND, "torch")
+
+    def test_retrieval_defaults_overfetch_then_rerank(self):
+        """Test RETRIEVAL_TOP_K/RERANK_TOP_N defaults are 20/5 with a reranker set."""
+        settings = get_settings()
+        self.assertEqual(settings.RERANK_MODEL, "BAAI/bge-reranker-base")
+        self.assertEqual(settings.RETRIEVAL_TOP_K, 20)
+        self.assertEqual(settings.RERANK_TOP_N, 5)
+
+    def test_chroma_mode_default_is_persistent(self):
+        """Test default value for CHROMA_MODE is 'persistent'."""
+        settings = get_settings()
+        self.assertEqual(settings.CHROMA_MODE, "persistent")
+
+    def test_chroma_port_correctly_cast_to_int(self):
+        """Test CHROMA_PORT is correctly cast to int type."""
+        self.monkeypatch.setenv("CHROMA_PORT", "9000")
+        settings = get_settings()
+        self.assertEqual(settings.CHROMA_PORT, 9000)
+        self.assertIsInstance(settings.CHROMA_PORT, int)
 
     def test_llm_provider_env_override(self):
         """Test environment variable override for LLM_PROVIDER."""
-        with patch.dict("os.environ", {"LLM_PROVIDER": "ollama"}, clear=False):
-            settings = get_settings()
-            self.assertEqual(settings.LLM_PROVIDER, "ollama")
+        self.monkeypatch.setenv("LLM_PROVIDER", "ollama")
+        settings = get_settings()
+        self.assertEqual(settings.LLM_PROVIDER, "ollama")
 
     def test_ollama_model_env_override(self):
         """Test environment variable override for OLLAMA_MODEL."""
-        with patch.dict("os.environ", {"OLLAMA_MODEL": "mistral"}, clear=False):
-            settings = get_settings()
-            self.assertEqual(settings.OLLAMA_MODEL, "mistral")
+        self.monkeypatch.setenv("OLLAMA_MODEL", "mistral")
+        settings = get_settings()
+        self.assertEqual(settings.OLLAMA_MODEL, "mistral")
 
     def test_ollama_base_url_env_override(self):
         """Test environment variable override for OLLAMA_BASE_URL."""
         custom_url = "http://custom-host:12345"
-        with patch.dict("os.environ", {"OLLAMA_BASE_URL": custom_url}, clear=False):
-            settings = get_settings()
-            self.assertEqual(settings.OLLAMA_BASE_URL, custom_url)
+        self.monkeypatch.setenv("OLLAMA_BASE_URL", custom_url)
+        settings = get_settings()
+        self.assertEqual(settings.OLLAMA_BASE_URL, custom_url)
 
     def test_ollama_timeout_env_override(self):
         """Test environment variable override for OLLAMA_TIMEOUT."""
-        with patch.dict("os.environ", {"OLLAMA_TIMEOUT": "300.0"}, clear=False):
-            settings = get_settings()
-            self.assertEqual(settings.OLLAMA_TIMEOUT, 300.0)
-            self.assertIsInstance(settings.OLLAMA_TIMEOUT, float)
+        self.monkeypatch.setenv("OLLAMA_TIMEOUT", "300.0")
+        settings = get_settings()
+        self.assertEqual(settings.OLLAMA_TIMEOUT, 300.0)
+        self.assertIsInstance(settings.OLLAMA_TIMEOUT, float)
 
     def test_ollama_context_window_env_override(self):
         """Test environment variable override for OLLAMA_CONTEXT_WINDOW."""
-        with patch.dict("os.environ", {"OLLAMA_CONTEXT_WINDOW": "32768"}, clear=False):
-            settings = get_settings()
-            self.assertEqual(settings.OLLAMA_CONTEXT_WINDOW, 32768)
-            self.assertIsInstance(settings.OLLAMA_CONTEXT_WINDOW, int)
+        self.monkeypatch.setenv("OLLAMA_CONTEXT_WINDOW", "32768")
+        settings = get_settings()
+        self.assertEqual(settings.OLLAMA_CONTEXT_WINDOW, 32768)
+        self.assertIsInstance(settings.OLLAMA_CONTEXT_WINDOW, int)
 
     def test_multiple_llm_env_overrides_together(self):
         """Test multiple LLM environment variable overrides work together."""
@@ -96,30 +147,39 @@ class TestLLMSettings(unittest.TestCase):
             "OLLAMA_TIMEOUT": "60.0",
             "OLLAMA_CONTEXT_WINDOW": "4096",
         }
-        with patch.dict("os.environ", env_vars, clear=False):
-            settings = get_settings()
-            self.assertEqual(settings.LLM_PROVIDER, "ollama")
-            self.assertEqual(settings.OLLAMA_MODEL, "neural-chat")
-            self.assertEqual(settings.OLLAMA_BASE_URL, "http://gpu-server:11434")
-            self.assertEqual(settings.OLLAMA_TIMEOUT, 60.0)
-            self.assertEqual(settings.OLLAMA_CONTEXT_WINDOW, 4096)
+        for name, value in env_vars.items():
+            self.monkeypatch.setenv(name, value)
+        settings = get_settings()
+        self.assertEqual(settings.LLM_PROVIDER, "ollama")
+        self.assertEqual(settings.OLLAMA_MODEL, "neural-chat")
+        self.assertEqual(settings.OLLAMA_BASE_URL, "http://gpu-server:11434")
+        self.assertEqual(settings.OLLAMA_TIMEOUT, 60.0)
+        self.assertEqual(settings.OLLAMA_CONTEXT_WINDOW, 4096)
 
     def test_settings_independence_between_calls(self):
-        """Test that settings calls are independent and don't share state."""
+        """Test that settings reloaded after cache_clear() don't share state."""
         # First call with default values
-        with patch.dict("os.environ", {}, clear=False):
-            settings1 = get_settings()
-            self.assertEqual(settings1.LLM_PROVIDER, "openai")
+        settings1 = get_settings()
+        self.assertEqual(settings1.LLM_PROVIDER, "openai")
 
         # Second call with overridden values
-        with patch.dict("os.environ", {"LLM_PROVIDER": "ollama"}, clear=False):
+        get_settings.cache_clear()
+        with pytest.MonkeyPatch.context() as monkeypatch:
+            monkeypatch.setenv("LLM_PROVIDER", "ollama")
             settings2 = get_settings()
             self.assertEqual(settings2.LLM_PROVIDER, "ollama")
 
         # Third call back to defaults - should not be affected by second call
-        with patch.dict("os.environ", {}, clear=False):
-            settings3 = get_settings()
-            self.assertEqual(settings3.LLM_PROVIDER, "openai")
+        get_settings.cache_clear()
+        settings3 = get_settings()
+        self.assertEqual(settings3.LLM_PROVIDER, "openai")
+
+    def test_settings_memoized_between_calls(self):
+        """Test that repeated calls return the same cached instance."""
+        settings1 = get_settings()
+        self.monkeypatch.setenv("LLM_PROVIDER", "ollama")
+        settings2 = get_settings()
+        self.assertIs(settings1, settings2)
 
 
 if __name__ == "__main__":